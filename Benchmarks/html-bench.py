@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+from common import htmltext
+from common.epub import iter_spine
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "html-results.json")
+HTML_EXTS = {".html", ".htm", ".xhtml"}
+
+# The calls the scripts make: whole-page text (ebook_convert, get-webpages) and
+# one content element with separator/strip (contents-scraper, wiki-scraper)
+TASKS = {
+    "get_text": lambda html, using: htmltext.get_text(html, using=using),
+    "select_text": lambda html, using: htmltext.select_text(
+        html, ["div#mw-content-text", "main", "article", "body"], separator="\n", strip=True, using=using),
+    "links": lambda html, using: htmltext.links(html, using=using),
+}
+
+WORDS = ("the storm light radiant spren shard oath knight honor bridge four plateau "
+         "highprince shardblade gemheart chasm windrunner surge lashing tower").split()
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def wiki_page(rng):
+    parts = [
+        "<!DOCTYPE html><html><head><title>Article &ndash; Wiki</title>",
+        "<style>.mw-body{margin:0}</style><script>var wgPageName = 'Article';</script></head><body>",
+        "<nav><ul>" + "".join(f'<li><a href="/wiki/P{i}">Page {i}</a></li>' for i in range(40)) + "</ul></nav>",
+        '<div id="mw-content-text" class="mw-body-content"><div class="mw-parser-output">',
+    ]
+    for s in range(12):
+        parts.append(f"<h2><span class=\"mw-headline\">Section {s}</span></h2>")
+        for _ in range(4):
+            parts.append("<p>" + " ".join(
+                f'<a href="/wiki/{w}">{w}</a>' if rng.random() < 0.1 else sentence(rng, 12)
+                for w in rng.sample(WORDS, 6)) + " &amp; more&#8230;</p>")
+        parts.append("<ul>" + "".join(f"<li>{sentence(rng, 6)}</li>" for _ in range(5)) + "</ul>")
+        parts.append("<!-- section end -->")
+    parts.append("</div></div><footer>Footer text</footer></body></html>")
+    return "\n".join(parts)
+
+
+def blog_page(rng):
+    body = "".join(f"<p>{sentence(rng, 25)} <em>{sentence(rng, 3)}</em></p>\n" for _ in range(30))
+    return (
+        "<html><head><title>Blog</title><script>window.dataLayer=[];</script></head><body>"
+        '<header><a href="/">Home</a><a href="/blog">Blog</a></header>'
+        f'<main><article><h1 class="h2">Post</h1><div class="blog-item__date">May 1</div>{body}</article></main>'
+        "<aside><p>Share</p></aside></body></html>"
+    )
+
+
+def epub_chapter(rng):
+    paras = "".join(f"<p class=\"indent\">{sentence(rng, 30)}</p>\n" for _ in range(60))
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Chapter</title>'
+        '<link rel="stylesheet" href="style.css"/></head>'
+        f'<body><section><h1>Chapter One</h1>{paras}<br/></section></body></html>'
+    ).encode("utf-8")
+
+
+def furigana_chapter(rng):
+    # Japanese ebooks annotate kanji with ruby, often leaving </rt> and </rp> implied
+    words = [("漢字", "かんじ"), ("物語", "ものがたり"), ("騎士", "きし"), ("嵐", "あらし")]
+    paras = []
+    for _ in range(40):
+        ruby = []
+        for kanji, kana in rng.sample(words, 3):
+            if rng.random() < 0.5:
+                ruby.append(f"<ruby>{kanji}<rp>(<rt>{kana}<rp>)</ruby>")
+            else:
+                ruby.append(f"<ruby>{kanji}<rp>(</rp><rt>{kana}</rt><rp>)</rp></ruby>")
+        paras.append(f"<p>{'の'.join(ruby)} {sentence(rng, 8)}</p>\n")
+    return (
+        "<html><head><title>第一章</title></head>"
+        f"<body><section><h1>第一章</h1>{''.join(paras)}</section></body></html>"
+    )
+
+
+def legacy_page(rng):
+    # Older sites still serve ISO-8859-1, declared only in a <meta> tag
+    body = "".join(f"<p>{sentence(rng, 20)} Café, naïve, señor &copy; 1999.</p>\n" for _ in range(30))
+    return (
+        '<html><head><meta http-equiv="Content-Type" content="text/html; charset=iso-8859-1">'
+        f"<title>Página</title></head><body><main>{body}</main></body></html>"
+    ).encode("iso-8859-1")
+
+
+def synthetic_corpus(count):
+    rng = random.Random(1234)
+    makers = [("wiki", wiki_page), ("blog", blog_page), ("epub", epub_chapter),
+              ("furigana", furigana_chapter), ("legacy", legacy_page)]
+    return [(f"{kind}-{i}", make(rng)) for i in range(count) for kind, make in makers]
+
+
+def load_corpus(paths):
+    corpus = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, files in os.walk(path):
+                for name in sorted(files):
+                    corpus.extend(load_corpus([os.path.join(folder, name)]))
+        elif path.lower().endswith(".epub"):
+            corpus.extend((f"{os.path.basename(path)}:{name}", data) for name, data in iter_spine(path))
+        elif os.path.splitext(path)[1].lower() in HTML_EXTS:
+            with open(path, "rb") as f:
+                corpus.append((path, f.read()))
+    return corpus
+
+
+def normalize(result):
+    if isinstance(result, list):
+        return [(href, " ".join(text.split())) for href, text in result]
+    return " ".join((result or "").split())
+
+
+def run_task(task, corpus, using, repeats):
+    best = None
+    outputs = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = [task(html, using) for _, html in corpus]
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+        outputs = results
+    return best, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML-to-text backends for speed and output equivalence.")
+    parser.add_argument("paths", nargs="*", help="HTML/XHTML files, EPUBs or folders to use as the corpus (default: synthetic pages)")
+    parser.add_argument("--pages", type=int, default=20, help="synthetic pages of each kind (default 20)")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per measurement, best is kept (default 3)")
+    parser.add_argument("--output", default=RESULTS_FILE, help="JSON results file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.paths) if args.paths else synthetic_corpus(args.pages)
+    if not corpus:
+        print("No HTML found in the given paths.")
+        return
+    total_bytes = sum(len(html) for _, html in corpus)
+
+    backends = htmltext.available_backends()
+    reference = "bs4" if "bs4" in backends else "stdlib"
+    print(f"{len(corpus)} pages, {total_bytes / 1e6:.1f} MB; backends: {', '.join(backends)}; "
+          f"reference: {reference}; default: {htmltext.backend()}\n")
+
+    results = {}
+    for task_name, task in TASKS.items():
+        _, expected = run_task(task, corpus, reference, 1)
+        print(f"{task_name}")
+        print(f"  {'backend':<12}{'pages/s':>10}{'MB/s':>8}{'exact':>9}{'ws-equal':>10}")
+        for name in backends:
+            elapsed, outputs = run_task(task, corpus, name, args.repeats)
+            exact = sum(a == b for a, b in zip(outputs, expected))
+            loose = sum(normalize(a) == normalize(b) for a, b in zip(outputs, expected))
+            differing = [corpus[i][0] for i, (a, b) in enumerate(zip(outputs, expected)) if normalize(a) != normalize(b)]
+            results.setdefault(name, {})[task_name] = {
+                "pages_per_sec": len(corpus) / elapsed,
+                "mb_per_sec": total_bytes / 1e6 / elapsed,
+                "exact": exact,
+                "whitespace_equal": loose,
+                "differing": differing[:10],
+            }
+            print(f"  {name:<12}{len(corpus) / elapsed:>10.1f}{total_bytes / 1e6 / elapsed:>8.2f}"
+                  f"{exact:>5}/{len(corpus):<3}{loose:>6}/{len(corpus):<3}")
+            if differing:
+                print(f"    differs on: {', '.join(differing[:3])}{' ...' if len(differing) > 3 else ''}")
+        print()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pages": len(corpus),
+            "bytes": total_bytes,
+            "reference": reference,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import importlib.util
+from collections import Counter
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf-results.json")
+PDF_TXT = os.path.join(ROOT_DIR, "File-Conversion", "pdf-txt.py")
+
+WORDS = ("the storm light radiant spren shard oath knight honor bridge four plateau "
+         "highprince shardblade gemheart chasm windrunner surge lashing tower").split()
+
+
+def load_pdf_txt():
+    # pdf-txt.py has a hyphen in its name, so it's loaded from its path
+    spec = importlib.util.spec_from_file_location("pdf_txt", PDF_TXT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_sample_pdf(path, pages, seed=1234):
+    """Writes a plain text-only PDF: `pages` pages of 45 lines in 5-line paragraphs, two columns on odd pages."""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        columns = [(72, 60)] if page % 2 == 0 else [(72, 28), (320, 28)]
+        ops = []
+        for x, width in columns:
+            ops.append(f"BT /F1 10 Tf 12 TL {x} 740 Td")
+            for i in range(45):
+                line = " ".join(rng.choice(WORDS) for _ in range(width // 6))
+                ops.append(f"({line[:width]}) Tj T*")
+                if i % 5 == 4:
+                    ops.append("T*")    # paragraph break, so pages have many text boxes
+            ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def find_pdfs(paths):
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, files in os.walk(path):
+                pdfs.extend(os.path.join(folder, n) for n in sorted(files) if n.lower().endswith(".pdf"))
+        elif path.lower().endswith(".pdf"):
+            pdfs.append(path)
+    return pdfs
+
+
+def word_overlap(text, reference):
+    """Share of the reference's words (with multiplicity) that the text also contains."""
+    ref = Counter(reference.split())
+    if not ref:
+        return 1.0
+    return sum((Counter(text.split()) & ref).values()) / sum(ref.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pdf-txt extraction profiles for speed and output.")
+    parser.add_argument("paths", nargs="*", help="PDFs or folders to benchmark (default: a generated sample PDF)")
+    parser.add_argument("--pages", type=int, default=40, help="pages in the generated sample (default 40)")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per profile, best is kept (default 3)")
+    parser.add_argument("--output", default=RESULTS_FILE, help="JSON results file")
+    args = parser.parse_args()
+
+    try:
+        import pdfminer  # noqa: F401
+    except ImportError:
+        print("pdfminer.six is not installed (pip install pdfminer.six).")
+        sys.exit(1)
+    pdf_txt = load_pdf_txt()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdfs = find_pdfs(args.paths)
+        if not args.paths:
+            sample = os.path.join(tmp, "sample.pdf")
+            write_sample_pdf(sample, args.pages)
+            pdfs = [sample]
+        if not pdfs:
+            print("No PDFs found in the given paths.")
+            return
+
+        page_counts = {pdf: pdf_txt.count_pages(pdf) for pdf in pdfs}
+        total_pages = sum(page_counts.values())
+        print(f"{len(pdfs)} PDFs, {total_pages} pages\n")
+
+        timings = {}
+        outputs = {}
+        for profile in pdf_txt.PROFILES:
+            best = None
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                texts = [pdf_txt.extract_range((pdf, 0, page_counts[pdf], profile)) for pdf in pdfs]
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[profile] = best
+            outputs[profile] = texts
+
+    reference = outputs["layout"]
+    results = {}
+    print(f"{'profile':<10}{'pages/s':>10}{'speedup':>9}{'words':>9}{'identical':>11}")
+    for profile, elapsed in timings.items():
+        overlap = sum(word_overlap(t, r) for t, r in zip(outputs[profile], reference)) / len(pdfs)
+        identical = sum(t == r for t, r in zip(outputs[profile], reference))
+        results[profile] = {
+            "seconds": elapsed,
+            "pages_per_sec": total_pages / elapsed,
+            "speedup": timings["layout"] / elapsed,
+            "word_overlap": overlap,
+            "identical": identical,
+        }
+        print(f"{profile:<10}{total_pages / elapsed:>10.1f}{timings['layout'] / elapsed:>8.1f}x"
+              f"{overlap:>9.1%}{identical:>7}/{len(pdfs)}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pdfs": [os.path.basename(p) for p in pdfs] if args.paths else ["<generated sample>"],
+            "pages": total_pages,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import os
+import ast
+import sys
+import json
+import time
+import queue
+import argparse
+import platform
+import statistics
+import subprocess
+import threading
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_DIRS = ["File-Conversion", "File-Renaming", "File-Sorting", "Web Scraping"]
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup-results.json")
+
+PROMPT_TIMEOUT = 30       # seconds to wait for a script's first prompt
+REGRESSION_RATIO = 1.25   # flag anything 25% slower than the previous run...
+REGRESSION_MIN = 0.005    # ...and at least 5 ms slower, to ignore timer noise
+
+
+def find_scripts():
+    scripts = []
+    for folder in SCRIPT_DIRS:
+        base = os.path.join(ROOT_DIR, folder)
+        for name in sorted(os.listdir(base)):
+            if name.endswith(".py"):
+                scripts.append(os.path.join(base, name))
+    return scripts
+
+
+def top_level_imports(script_path):
+    """Returns the script's module-level import statements as source lines."""
+    with open(script_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script_path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def calls_input(script_path):
+    with open(script_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script_path)
+    return any(
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "input"
+        for node in ast.walk(tree)
+    )
+
+
+def time_imports(script_path, imports):
+    """
+    Times the script's top-level imports in a fresh interpreter.
+    Only the import statements run, so scripts that act at import time are safe to measure.
+    """
+    code = "\n".join([
+        "import sys, time",
+        f"sys.path[:0] = [{os.path.dirname(script_path)!r}, {ROOT_DIR!r}]",
+        "_t = time.perf_counter()",
+        *imports,
+        "print(time.perf_counter() - _t)",
+    ])
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        last = (result.stderr.strip().splitlines() or ["import failed"])[-1]
+        return None, last
+    return float(result.stdout.strip()), None
+
+
+def time_to_first_prompt(script_path):
+    """Starts the script and measures how long it takes to print anything, then kills it."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, script_path],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(script_path),
+        env=env,
+    )
+
+    first = queue.Queue()
+    threading.Thread(target=lambda: first.put(proc.stdout.read(1)), daemon=True).start()
+
+    try:
+        data = first.get(timeout=PROMPT_TIMEOUT)
+        elapsed = time.perf_counter() - start
+    except queue.Empty:
+        data, elapsed = None, None
+    finally:
+        proc.kill()
+        proc.wait()
+
+    if not data:
+        return None, "no prompt (crashed or timed out)"
+    return elapsed, None
+
+
+def measure(script_path, repeats):
+    entry = {"script": os.path.relpath(script_path, ROOT_DIR).replace(os.sep, "/")}
+
+    imports = top_level_imports(script_path)
+    samples = []
+    for _ in range(repeats + 1):
+        seconds, error = time_imports(script_path, imports)
+        if error:
+            entry["import_error"] = error
+            break
+        samples.append(seconds)
+
+    if samples:
+        entry["import_cold"] = samples[0]
+        entry["import_warm"] = statistics.median(samples[1:]) if len(samples) > 1 else samples[0]
+
+    # Scripts without a prompt start working immediately (moving files, opening
+    # browsers), so they are never launched here
+    if calls_input(script_path):
+        prompts = []
+        for _ in range(repeats):
+            seconds, error = time_to_first_prompt(script_path)
+            if error:
+                entry["prompt_error"] = error
+                break
+            prompts.append(seconds)
+        if prompts:
+            entry["first_prompt"] = statistics.median(prompts)
+    else:
+        entry["prompt_error"] = "skipped (script does not prompt)"
+
+    return entry
+
+
+def baseline(repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def fmt(seconds):
+    return f"{seconds * 1000:8.1f} ms" if seconds is not None else "       -   "
+
+
+def compare(previous, current):
+    old = {e["script"]: e for e in previous.get("scripts", [])}
+    regressions = []
+    for entry in current["scripts"]:
+        before = old.get(entry["script"])
+        if not before:
+            continue
+        for key in ("import_warm", "first_prompt"):
+            if key not in entry or key not in before:
+                continue
+            if entry[key] > before[key] * REGRESSION_RATIO and entry[key] - before[key] > REGRESSION_MIN:
+                regressions.append((entry["script"], key, before[key], entry[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-prompt for every script.")
+    parser.add_argument("--repeats", type=int, default=5, help="warm runs per measurement (default 5)")
+    parser.add_argument("--output", default=RESULTS_FILE, help="JSON results file (previous results are compared, then replaced)")
+    parser.add_argument("scripts", nargs="*", help="only measure scripts whose name contains one of these")
+    args = parser.parse_args()
+
+    scripts = find_scripts()
+    if args.scripts:
+        scripts = [s for s in scripts if any(f in os.path.basename(s) for f in args.scripts)]
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "interpreter_startup": baseline(args.repeats),
+        "scripts": [],
+    }
+
+    print(f"Interpreter startup: {fmt(results['interpreter_startup'])}\n")
+    print(f"{'script':<40} {'import cold':>12} {'import warm':>12} {'1st prompt':>12}")
+
+    for script in scripts:
+        entry = measure(script, args.repeats)
+        results["scripts"].append(entry)
+        note = entry.get("import_error") or entry.get("prompt_error") or ""
+        print(f"{entry['script']:<40} {fmt(entry.get('import_cold')):>12} "
+              f"{fmt(entry.get('import_warm')):>12} {fmt(entry.get('first_prompt')):>12}  {note}")
+
+    if os.path.exists(args.output):
+        with open(args.output, encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare(previous, results)
+        print(f"\nCompared with {previous.get('timestamp', 'previous run')}: {len(regressions)} regression(s)")
+        for script, key, before, after in regressions:
+            print(f"  {script} {key}: {fmt(before).strip()} -> {fmt(after).strip()}")
+
+        # A filtered run only replaces the scripts it measured
+        if args.scripts:
+            measured = {e["script"] for e in results["scripts"]}
+            kept = [e for e in previous.get("scripts", []) if e["script"] not in measured]
+            results["scripts"] = sorted(kept + results["scripts"], key=lambda e: e["script"])
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,16 @@
 import os
-from ebooklib import epub
-from bs4 import BeautifulSoup
-import ebooklib
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
+from common.manifest import Manifest, SKIP, REUSE
+from common.epub import iter_spine
+from common.htmltext import get_text, backend
+
+# Bump whenever the text output changes, so the manifest reconverts everything.
+# The HTML backend is part of the version since backends can differ in whitespace.
+CONVERTER_VERSION = 3
 
 def normalize_path_input(value):
     value = value.strip()
@@ -11,30 +20,93 @@ def normalize_path_input(value):
 
 
 def convert_epub_to_text(epub_path, output_path):
+    """Converts one EPUB and returns (success, one-line result message)."""
+    partial_path = output_path + '.part'
     try:
-        book = epub.read_epub(epub_path)
-        text_content = []
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                soup = BeautifulSoup(item.get_content(), 'html.parser')
-                text_content.append(soup.get_text())
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(text_content))
-        print(f"Converted: {epub_path} -> {output_path}")
+        # Stream the spine in reading order, writing each chapter as soon as it's parsed
+        with open(partial_path, 'w', encoding='utf-8') as f:
+            for i, (_, content) in enumerate(iter_spine(epub_path)):
+                if i:
+                    f.write('\n')
+                f.write(get_text(content))
+        os.replace(partial_path, output_path)
+        return True, f"Converted: {epub_path} -> {output_path}"
     except Exception as e:
-        print(f"Failed to convert {epub_path}: {e}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return False, f"Failed to convert {epub_path}: {e}"
+
+
+def convert_pair(paths):
+    return convert_epub_to_text(*paths)
+
+
+def plan_conversions(directory, manifest, force=False):
+    """Returns the (epub, txt) pairs that actually need converting (all of them with force)."""
+    pairs = []
+    skipped = 0
+    for entry in scan_files(directory, {'.epub'}, parallel=True):
+        epub_path = entry.path
+        txt_path = os.path.splitext(epub_path)[0] + '.txt'
+
+        if force:
+            pairs.append((epub_path, txt_path))
+            continue
+
+        action, previous = manifest.plan(epub_path, txt_path, entry.stat())
+        if action == SKIP:
+            skipped += 1
+        elif action == REUSE:
+            manifest.reuse(epub_path, txt_path, previous)
+            print(f"Reused: {previous} -> {txt_path}")
+        else:
+            pairs.append((epub_path, txt_path))
+
+    if skipped:
+        print(f"Up to date: {skipped} books")
+    return pairs
+
+
+def find_and_convert_epubs(directory, workers=1, force=False):
+    # Forced runs skip the up-to-date check but still record what they convert
+    manifest = Manifest("ebook_convert", f"{CONVERTER_VERSION}-{backend()}")
+    pairs = plan_conversions(directory, manifest, force)
+
+    def finish(pair, result):
+        ok, message = result
+        print(message)
+        if ok:
+            manifest.record(*pair)
+
+    try:
+        if workers <= 1 or len(pairs) <= 1:
+            for pair in pairs:
+                finish(pair, convert_pair(pair))
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Parsing is CPU-bound, so each book goes to its own process
+        print(f"Converting {len(pairs)} books with {workers} workers")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for pair, result in zip(pairs, pool.map(convert_pair, pairs, chunksize=4)):
+                finish(pair, result)
+    finally:
+        manifest.close()
 
 
-def find_and_convert_epubs(directory):
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.lower().endswith('.epub'):
-                epub_path = os.path.join(root, file)
-                txt_path = os.path.splitext(epub_path)[0] + '.txt'
-                convert_epub_to_text(epub_path, txt_path)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert every .epub under a directory to .txt.")
+    parser.add_argument("directory", nargs="?", help="directory to search (prompted for if omitted)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="books to convert in parallel (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="reconvert every book, even ones whose .txt is up to date")
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    directory = normalize_path_input(input("Enter the directory to search for .epub files: "))
-    find_and_convert_epubs(directory)
+    args = parse_args()
+    directory = args.directory or input("Enter the directory to search for .epub files: ")
+    find_and_convert_epubs(normalize_path_input(directory), args.workers, force=args.force)
     
@@ -1,14 +1,15 @@
-# DEPENDANCY: BeautifulSoup, ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.epub import iter_spine
+from common.htmltext import get_text
 
 def epub_to_txt(epub_path, txt_path):
-    book = epub.read_epub(epub_path)
+    # Only the spine's documents are read, in reading order, one chapter at a time
     with open(txt_path, 'w', encoding='utf-8') as txt_file:
-        for item in book.get_items():
-            if item.get_type() == epub.ITEM_DOCUMENT:
-                soup = BeautifulSoup(item.get_content(), 'html.parser')
-                txt_file.write(soup.get_text())
+        for _, content in iter_spine(epub_path):
+            txt_file.write(get_text(content))
 
 # Example usage
 epub_path = "C:/Users/Srulik's User/Downloads/Icarus+Needle+The+Icarus+Series+Book+5+The+-+Timothy+Zahn (1).epub"
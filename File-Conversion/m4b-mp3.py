@@ -1,68 +1,89 @@
 import os
-import subprocess
-import json
+import sys
 import math
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
+from common.ffjobs import FFJob, run_jobs, print_result, summarize
+from common import probe
+
+# Audio codecs that can be stream-copied into per-chapter files, and the extension to use.
+# Anything else is transcoded to MP3.
+COPY_FORMATS = {"aac": ".m4a"}
 
 def sanitize_path(path):
     """Removes surrounding quotes and strips whitespace."""
     return path.strip().strip('"').strip("'")
 
 def extract_chapters(m4b_file):
-    cmd = [
-        "ffprobe",
-        "-i", m4b_file,
-        "-print_format", "json",
-        "-show_chapters",
-        "-loglevel", "quiet"
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    try:
-        return json.loads(result.stdout).get('chapters', [])
-    except json.JSONDecodeError:
-        return []
+    return probe.chapters(probe.probe(m4b_file))
 
 def get_duration(m4b_file):
+    return probe.duration(probe.probe(m4b_file))
+
+def output_format(m4b_file, force_mp3=False):
+    """Returns (extension, copy): stream copy for AAC books unless MP3 is required."""
+    if not force_mp3:
+        audio = probe.streams(probe.probe(m4b_file), "audio")
+        if audio and audio[0].get("codec_name") in COPY_FORMATS:
+            return COPY_FORMATS[audio[0]["codec_name"]], True
+    return ".mp3", False
+
+def split_job(m4b_file, start, length, output_path, label, copy=False):
+    """
+    Extracts [start, start + length) of the book. -ss before -i seeks the input
+    (accurately when transcoding), so each job decodes only its own range
+    and splitting a whole book costs one pass over it. With copy, the audio
+    is remuxed untouched, which runs at disk speed.
+    """
+    if copy:
+        codec = ["-map", "0:a:0", "-c", "copy"]
+    else:
+        codec = ["-acodec", "libmp3lame", "-ab", "128k"]
     cmd = [
-        "ffprobe",
-        "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        m4b_file
+        "ffmpeg",
+        "-ss", str(start),
+        "-t", str(length),
+        "-i", m4b_file,
+        "-vn",
+        *codec,
+        "-y",
+        output_path
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    try:
-        return float(result.stdout.strip())
-    except ValueError:
-        return 0
+    return FFJob(cmd, label=label, output=output_path)
 
-def convert_chapters_to_mp3(m4b_file, output_dir):
+def chapter_jobs(m4b_file, output_dir, force_mp3=False):
+    """Plans one job per chapter (or per 2-hour segment) of a book."""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
+    jobs = []
+    ext, copy = output_format(m4b_file, force_mp3)
+    if copy:
+        print(f"AAC audio: copying chapters to {ext} without re-encoding")
+
     chapters = extract_chapters(m4b_file)
     if chapters:
         print(f"Found {len(chapters)} chapters in {os.path.basename(m4b_file)}")
+        used_names = set()
         for i, chapter in enumerate(chapters):
             start = float(chapter['start_time'])
             end = float(chapter['end_time'])
             title = chapter.get('tags', {}).get('title', f"Chapter_{i+1}")
             safe_title = "".join(c if c.isalnum() or c in " _-" else "_" for c in title)
-            output_path = os.path.join(output_dir, f"{safe_title}.mp3")
-
-            print(f"Processing: {safe_title} ({start:.2f}s - {end:.2f}s)")
-
-            cmd = [
-                "ffmpeg",
-                "-i", m4b_file,
-                "-ss", str(start),
-                "-to", str(end),
-                "-vn",
-                "-acodec", "libmp3lame",
-                "-ab", "128k",
-                "-y",
-                output_path
-            ]
-            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            # Repeated titles ("Chapter", "Untitled") run concurrently, so each needs its own file
+            name = safe_title
+            n = 2
+            while name.lower() in used_names:
+                name = f"{safe_title} ({n})"
+                n += 1
+            used_names.add(name.lower())
+            output_path = os.path.join(output_dir, f"{name}{ext}")
+
+            label = f"{name} ({start:.2f}s - {end:.2f}s)"
+            jobs.append(split_job(m4b_file, start, end - start, output_path, label, copy))
     else:
         print(f"No chapters found in {os.path.basename(m4b_file)}. Splitting into 2-hour segments.")
         duration = get_duration(m4b_file)
@@ -72,47 +93,73 @@ def convert_chapters_to_mp3(m4b_file, output_dir):
         for i in range(num_segments):
             start = i * segment_length
             segment_duration = min(segment_length, duration - start)
-            output_path = os.path.join(output_dir, f"Segment_{i+1:02d}.mp3")
-
-            print(f"Processing: Segment {i+1} ({start:.2f}s for {segment_duration:.2f}s)")
-
-            cmd = [
-                "ffmpeg",
-                "-ss", str(start),
-                "-t", str(segment_duration),
-                "-i", m4b_file,
-                "-vn",
-                "-acodec", "libmp3lame",
-                "-ab", "128k",
-                "-y",
-                output_path
-            ]
-            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-            # Verify output exists
-            if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
-                print(f"⚠️ Failed to create: {output_path}")
-            else:
-                print(f"✅ Created: {output_path}")
-
-def process_path(path):
+            output_path = os.path.join(output_dir, f"Segment_{i+1:02d}{ext}")
+
+            label = f"Segment {i+1} ({start:.2f}s for {segment_duration:.2f}s)"
+            jobs.append(split_job(m4b_file, start, segment_duration, output_path, label, copy))
+
+    for job in jobs:
+        job.source = m4b_file
+    return jobs
+
+def convert_books(books, force_mp3=False, workers=None):
+    """
+    Splits several books at once. books is a list of (m4b_file, output_dir);
+    every chapter of every book goes on one bounded pool, and since each job
+    seeks to its own range, a shelf of books scales with the core count.
+    """
+    # Probe the whole shelf concurrently before planning
+    probe.probe_many([m4b_file for m4b_file, _ in books])
+
+    jobs = []
+    for m4b_file, output_dir in books:
+        book_jobs = chapter_jobs(m4b_file, output_dir, force_mp3)
+        if len(books) > 1:
+            book_name = os.path.splitext(os.path.basename(m4b_file))[0]
+            for job in book_jobs:
+                job.label = f"{book_name}: {job.label}"
+        jobs.extend(book_jobs)
+
+    run_jobs(jobs, workers=workers, on_start=lambda job: print(f"Processing: {job.label}"), on_done=report_job)
+    if len(jobs) > 1:
+        print(f"Done: {summarize(jobs)}")
+
+def convert_chapters_to_mp3(m4b_file, output_dir, force_mp3=False, workers=None):
+    convert_books([(m4b_file, output_dir)], force_mp3, workers)
+
+
+def report_job(job):
+    # ffmpeg can exit cleanly yet write nothing, so also verify the output exists
+    if job.ok and (not os.path.exists(job.output) or os.path.getsize(job.output) == 0):
+        job.status = "failed"
+    print_result(job)
+
+def process_path(path, force_mp3=False, workers=None):
     path = sanitize_path(path)
     if os.path.isfile(path) and path.lower().endswith(".m4b"):
         base_dir = os.path.dirname(path)
         base_name = os.path.splitext(os.path.basename(path))[0]
         output_dir = os.path.join(base_dir, base_name)
-        convert_chapters_to_mp3(path, output_dir)
+        convert_chapters_to_mp3(path, output_dir, force_mp3, workers)
     elif os.path.isdir(path):
-        for root, _, files in os.walk(path):
-            for file in files:
-                if file.lower().endswith(".m4b"):
-                    full_path = os.path.join(root, file)
-                    base_name = os.path.splitext(file)[0]
-                    output_dir = os.path.join(root, base_name)
-                    convert_chapters_to_mp3(full_path, output_dir)
+        books = []
+        for entry in scan_files(path, {".m4b"}):
+            base_name = os.path.splitext(entry.name)[0]
+            books.append((entry.path, os.path.join(os.path.dirname(entry.path), base_name)))
+        convert_books(books, force_mp3, workers)
     else:
         print("Invalid path. Please provide a valid .m4b file or folder containing .m4b files.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Split .m4b audiobooks into one file per chapter.")
+    parser.add_argument("path", nargs="?", help=".m4b file or folder (prompted for if omitted)")
+    parser.add_argument("--mp3", action="store_true",
+                        help="always transcode to MP3 (default: AAC books are copied into .m4a files as-is)")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="ffmpeg processes to run at once (default: half the CPU cores)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    input_path = input("Enter the path to the .m4b file or folder: ")
-    process_path(input_path)
+    args = parse_args()
+    input_path = args.path or input("Enter the path to the .m4b file or folder: ")
+    process_path(input_path, force_mp3=args.mp3, workers=args.workers)
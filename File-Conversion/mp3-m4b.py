@@ -1,46 +1,29 @@
-import subprocess
+import os
 import sys
+import argparse
 import tempfile
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
+from common.ffjobs import FFJob, run_jobs, print_result, summarize
+from common import probe
+
 def normalize_path_input(value):
     value = value.strip()
     if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
         return value[1:-1].strip()
     return value
 
-def run(cmd):
-    subprocess.run(cmd, check=True)
-
 def get_duration(file):
-    cmd = [
-        "ffprobe", "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        str(file)
-    ]
-    return float(subprocess.check_output(cmd).decode().strip())
+    # A missing duration would silently shift every later chapter, so it's an error
+    info = probe.probe(file)
+    if "duration" not in info.get("format", {}):
+        raise ValueError(f"Could not read the duration of {file}")
+    return probe.duration(info)
 
 def get_artist(file):
-    cmd = [
-        "ffprobe", "-v", "error",
-        "-show_entries", "format_tags=artist",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        str(file)
-    ]
-    try:
-        return subprocess.check_output(cmd).decode().strip()
-    except:
-        return ""
-
-def extract_cover(file, out):
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", str(file),
-        "-an", "-vcodec", "copy",
-        str(out)
-    ]
-    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return probe.tags(probe.probe(file)).get("artist", "").strip()
 
 def prompt_folder():
     while True:
@@ -50,101 +33,222 @@ def prompt_folder():
             return path
         print("Invalid folder. Try again.\n")
 
-def main():
-    if len(sys.argv) > 1:
-        folder = Path(sys.argv[1])
-    else:
-        folder = prompt_folder()
+def pause(interactive, message="Press Enter to exit..."):
+    # Keeps a double-clicked console open; under utils.py --each or with the
+    # folder on the command line there's nobody to press Enter (input() hits EOF)
+    if interactive:
+        input(message)
 
-    mp3s = sorted(folder.glob("*.mp3"))
-    if not mp3s:
-        print("No mp3 files found in that folder.")
-        input("Press Enter to exit...")
-        sys.exit(1)
+def ffmetadata_escape(value):
+    # '=', ';', '#', '\\' and newlines are special in ffmetadata files
+    for ch in ("\\", "=", ";", "#", "\n"):
+        value = value.replace(ch, "\\" + ch)
+    return value
 
-    first = mp3s[0]
-    artist = get_artist(first)
+def chapter_metadata(mp3s):
+    """ffmetadata with one chapter per MP3, timed from the (cached) probe durations."""
+    start = 0.0
+    lines = [";FFMETADATA1"]
 
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp = Path(tmp)
+    for m in mp3s:
+        dur = get_duration(m)
+        end = start + dur
+
+        title = m.stem.replace("_", " ").replace("-", " ")
 
-        list_file = tmp / "list.txt"
-        meta_file = tmp / "metadata.txt"
-        merged_file = tmp / "merged.wav"
-        cover_file = tmp / "cover.jpg"
+        lines.append("[CHAPTER]")
+        lines.append("TIMEBASE=1/1000")
+        lines.append(f"START={int(start * 1000)}")
+        lines.append(f"END={int(end * 1000)}")
+        lines.append(f"title={ffmetadata_escape(title)}")
+        lines.append("")
 
-        with open(list_file, "w", encoding="utf-8") as f:
-            for m in mp3s:
-                f.write(f"file '{m.as_posix()}'\n")
+        start = end
 
-        # Decode + concatenate → WAV (clean intermediate)
-        run([
-            "ffmpeg", "-y",
-            "-f", "concat", "-safe", "0",
-            "-i", str(list_file),
-            "-vn",
-            str(merged_file)
-        ])
+    return "\n".join(lines)
 
-        # Chapters
-        start = 0.0
-        lines = []
+def has_cover(file):
+    # MP3 cover art shows up as a (single-frame) video stream
+    return bool(probe.streams(probe.probe(file), "video"))
 
+def build_job(mp3s, list_file, meta_file, out_file):
+    """
+    One ffmpeg pass: the concat demuxer decodes the MP3s straight into the AAC
+    encoder, with the chapters and the first file's cover muxed in alongside.
+    """
+    first = mp3s[0]
+    artist = get_artist(first)
+    cover = has_cover(first)
+
+    with open(list_file, "w", encoding="utf-8") as f:
         for m in mp3s:
-            dur = get_duration(m)
-            end = start + dur
+            # ffmpeg resolves relative entries against the list file's (temp) folder,
+            # so entries are absolute. Quotes inside a quoted path are written as '\''
+            quoted = m.resolve().as_posix().replace("'", "'\\''")
+            f.write(f"file '{quoted}'\n")
+    Path(meta_file).write_text(chapter_metadata(mp3s), encoding="utf-8")
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "concat", "-safe", "0",
+        "-i", str(list_file),
+        "-i", str(meta_file)
+    ]
 
-            title = m.stem.replace("_", " ").replace("-", " ")
+    if cover:
+        cmd += ["-i", str(first)]
 
-            lines.append("[CHAPTER]")
-            lines.append("TIMEBASE=1/1000")
-            lines.append(f"START={int(start * 1000)}")
-            lines.append(f"END={int(end * 1000)}")
-            lines.append(f"title={title}")
-            lines.append("")
+    cmd += [
+        "-map_metadata", "1",
+        "-map_chapters", "1",
+        "-map", "0:a",
+        "-c:a", "aac",
+        "-b:a", "96k"
+    ]
 
-            start = end
+    if cover:
+        cmd += ["-map", "2:v:0", "-c:v", "copy", "-disposition:v", "attached_pic"]
 
-        meta_file.write_text("\n".join(lines), encoding="utf-8")
+    if artist:
+        cmd += ["-metadata", f"artist={artist}"]
 
-        # Extract cover
-        extract_cover(first, cover_file)
-        cover_exists = cover_file.exists() and cover_file.stat().st_size > 0
+    # Written under a temporary name and renamed by finish_job, so an interrupted
+    # build never leaves an .m4b that looks newer than its MP3s
+    partial_file = Path(out_file).with_suffix(".partial.m4b")
+    cmd.append(str(partial_file))
 
-        out_file = folder / (folder.name + ".m4b")
+    return FFJob(cmd, label=str(out_file), output=str(partial_file),
+                 data={"final": Path(out_file), "artist": artist, "cover": cover})
 
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", str(merged_file),
-            "-i", str(meta_file)
-        ]
+def finish_job(job):
+    if job.ok:
+        os.replace(job.output, job.data["final"])
+        job.output = str(job.data["final"])
+
+def is_up_to_date(out_file, mp3s):
+    try:
+        built = out_file.stat().st_mtime
+    except OSError:
+        return False
+    return all(m.stat().st_mtime < built for m in mp3s)
+
+def find_books(root):
+    """
+    Leaf folders containing MP3s under root, as {folder: sorted mp3s}. Folders
+    with MP3-bearing subfolders are parents of books (or multi-disc sets) and
+    are left alone.
+    """
+    by_folder = {}
+    for entry in scan_files(root, {".mp3"}):
+        by_folder.setdefault(Path(entry.path).parent, []).append(Path(entry.path))
+    folders = set(by_folder)
+    books = {}
+    for folder, mp3s in sorted(by_folder.items()):
+        if any(other != folder and folder in other.parents for other in folders):
+            print(f"Skipping {folder}: its subfolders also contain MP3s")
+            continue
+        books[folder] = sorted(mp3s)
+    return books
+
+def batch(root, workers=None, force=False):
+    """Builds an .m4b for every MP3 leaf folder under root, several at a time."""
+    books = find_books(root)
+    if not books:
+        print("No folders with mp3 files found.")
+        return
+
+    # Every file's duration, artist and cover in one concurrent sweep
+    probe.probe_many([m for mp3s in books.values() for m in mp3s])
+
+    todo = []
+    for folder, mp3s in books.items():
+        out_file = folder / (folder.name + ".m4b")
+        if not force and is_up_to_date(out_file, mp3s):
+            continue
+        todo.append((mp3s, out_file))
+    skipped = len(books) - len(todo)
+    if skipped:
+        print(f"Up to date: {skipped} books")
+    if not todo:
+        return
+
+    print(f"Building {len(todo)} books")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        jobs = []
+        for i, (mp3s, out_file) in enumerate(todo):
+            try:
+                jobs.append(build_job(mp3s, tmp / f"list{i}.txt", tmp / f"metadata{i}.txt", out_file))
+            except ValueError as e:
+                print(f"⚠️ Skipping {out_file.parent}: {e}")
+
+        def done(job):
+            finish_job(job)
+            print_result(job)
+
+        run_jobs(jobs, workers=workers, on_done=done)
+    print(f"Done: {summarize(jobs)}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge a folder of MP3s into a chaptered .m4b audiobook.")
+    parser.add_argument("folder", nargs="?", help="folder of MP3s, or the library root with --batch (prompted for if omitted)")
+    parser.add_argument("--batch", action="store_true",
+                        help="build a book for every folder of MP3s under the given root, without pausing")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="books to encode at once in batch mode (default: half the CPU cores)")
+    parser.add_argument("--force", action="store_true",
+                        help="in batch mode, rebuild books whose .m4b is newer than their MP3s")
+    return parser.parse_args()
 
-        if cover_exists:
-            cmd += ["-i", str(cover_file)]
+def main():
+    args = parse_args()
+    interactive = not args.folder and sys.stdin.isatty()
+    if args.folder:
+        folder = Path(normalize_path_input(args.folder))
+    else:
+        folder = prompt_folder()
 
-        cmd += [
-            "-map_metadata", "1",
-            "-map", "0:a",
-            "-c:a", "aac",
-            "-b:a", "96k"
-        ]
+    if args.batch:
+        if not folder.is_dir():
+            print("Invalid folder.")
+            sys.exit(1)
+        batch(folder, args.workers, args.force)
+        return
 
-        if cover_exists:
-            cmd += ["-map", "2:v", "-c:v", "copy", "-disposition:v", "attached_pic"]
+    mp3s = sorted(folder.glob("*.mp3"))
+    if not mp3s:
+        print("No mp3 files found in that folder.")
+        pause(interactive)
+        sys.exit(1)
 
-        if artist:
-            cmd += ["-metadata", f"artist={artist}"]
+    # One cached ffprobe per file, run concurrently; later lookups hit the cache
+    probe.probe_many(mp3s)
 
-        cmd.append(str(out_file))
+    out_file = folder / (folder.name + ".m4b")
 
-        run(cmd)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        try:
+            job = build_job(mp3s, tmp / "list.txt", tmp / "metadata.txt", out_file)
+        except ValueError as e:
+            print(e)
+            pause(interactive)
+            sys.exit(1)
+        run_jobs([job], workers=1)
+        finish_job(job)
+
+    if not job.ok:
+        print("Failed to build the audiobook:")
+        print(job.error_text())
+        pause(interactive)
+        sys.exit(1)
 
-        print("\nDone.")
-        print(f"Output: {out_file}")
-        print(f"Artist: {artist or 'Not found'}")
-        print(f"Cover: {'Embedded' if cover_exists else 'None'}")
+    print("\nDone.")
+    print(f"Output: {out_file}")
+    print(f"Artist: {job.data['artist'] or 'Not found'}")
+    print(f"Cover: {'Embedded' if job.data['cover'] else 'None'}")
 
-        input("\nPress Enter to exit...")
+    pause(interactive, "\nPress Enter to exit...")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,25 @@
 import os
-import pdfminer.high_level
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
+from common.manifest import Manifest, SKIP, REUSE, CONVERT
+
+# Bump whenever the text output changes, so the manifest reconverts everything
+CONVERTER_VERSION = 1
+
+# Large PDFs are split into page ranges of this size and extracted on a process pool
+PAGES_PER_CHUNK = 25
+
+# Extraction profiles, cheapest first. Values are LAParams overrides; None skips
+# layout analysis entirely and emits text in content-stream order.
+PROFILES = {
+    "fast": None,                          # no layout analysis, for search indexing
+    "balanced": {"boxes_flow": None},      # lines and text boxes, without the costly box ordering
+    "layout": {},                          # pdfminer's full analysis (default LAParams)
+}
+DEFAULT_PROFILE = "layout"
 
 def normalize_path_input(value):
     value = value.strip()
@@ -7,29 +27,137 @@ def normalize_path_input(value):
         return value[1:-1].strip()
     return value
 
-def convert_pdf_to_text(pdf_path, txt_path):
-    """Converts a single PDF file to a text file."""
+def count_pages(pdf_path):
+    """Reads the page count from the document's page tree without parsing any page."""
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdftypes import resolve1
+
+    with open(pdf_path, "rb") as f:
+        document = PDFDocument(PDFParser(f))
+        try:
+            return int(resolve1(resolve1(document.catalog["Pages"])["Count"]))
+        except (KeyError, TypeError, ValueError):
+            # Broken page tree: walk it the slow way
+            return sum(1 for _ in PDFPage.create_pages(document))
+
+def extract_range(job):
+    """Extracts pages [first, last) of one PDF with the given profile. Runs in a pool worker."""
+    import pdfminer.high_level
+    from pdfminer.layout import LAParams
+
+    pdf_path, first, last, profile = job
+    pages = range(first, last)
+    overrides = PROFILES[profile]
+    if overrides is None:
+        from common.pdftext import extract_stream_text
+        return extract_stream_text(pdf_path, pages)
+    # extract_text treats laparams=None as "defaults", so always pass an instance
+    return pdfminer.high_level.extract_text(pdf_path, page_numbers=pages, laparams=LAParams(**overrides))
+
+def page_ranges(page_count, chunk=PAGES_PER_CHUNK):
+    return [(first, min(first + chunk, page_count)) for first in range(0, page_count, chunk)]
+
+def extract_chunks(pdf_path, pool, workers, profile=DEFAULT_PROFILE):
+    """
+    Yields the text of each page range in order. Only a few ranges are in
+    flight at once, so memory stays bounded however long the document is.
+    """
+    ranges = page_ranges(count_pages(pdf_path))
+    if pool is None or len(ranges) <= 1:
+        for first, last in ranges:
+            yield extract_range((pdf_path, first, last, profile))
+        return
+
+    from collections import deque
+
+    pending = deque()
+    for first, last in ranges:
+        pending.append(pool.submit(extract_range, (pdf_path, first, last, profile)))
+        if len(pending) >= workers * 2:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def convert_pdf_to_text(pdf_path, txt_path, pool=None, workers=1, profile=DEFAULT_PROFILE):
+    """
+    Converts a single PDF file to a text file. Returns True on success.
+    Page ranges are streamed to a .part file in order and moved into place at the end.
+    """
+    partial_path = txt_path + ".part"
     try:
-        text = pdfminer.high_level.extract_text(pdf_path)
-        with open(txt_path, "w", encoding="utf-8") as txt_file:
-            txt_file.write(text)
+        with open(partial_path, "w", encoding="utf-8") as txt_file:
+            for text in extract_chunks(pdf_path, pool, workers, profile):
+                txt_file.write(text)
+        os.replace(partial_path, txt_path)
         print(f"Converted: {pdf_path} -> {txt_path}")
+        return True
     except Exception as e:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
         print(f"Error converting {pdf_path}: {e}")
+        return False
+
+def manifest_version(profile):
+    # Other profiles produce different text, so they're tracked as separate versions;
+    # "layout" keeps the plain version so existing conversions stay valid
+    return str(CONVERTER_VERSION) if profile == "layout" else f"{CONVERTER_VERSION}-{profile}"
+
+def process_directory(root_dir, force=False, workers=1, profile=DEFAULT_PROFILE):
+    """Recursively finds and converts all PDFs in a directory, skipping ones already up to date unless forced."""
+    manifest = Manifest("pdf-txt", manifest_version(profile))
+    skipped = 0
+    pool = None
+
+    def convert(pdf_path, txt_path):
+        nonlocal pool
+        if pool is None and workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Started on the first PDF that needs converting, shared by all of them
+            pool = ProcessPoolExecutor(max_workers=workers)
+        return convert_pdf_to_text(pdf_path, txt_path, pool, workers, profile)
+
+    try:
+        for entry in scan_files(root_dir, {".pdf"}, parallel=True):
+            pdf_path = entry.path
+            txt_path = os.path.splitext(pdf_path)[0] + ".txt"
+
+            # Forced runs skip the up-to-date check but still record what they convert
+            action, previous = (CONVERT, None) if force else manifest.plan(pdf_path, txt_path, entry.stat())
+            if action == SKIP:
+                skipped += 1
+            elif action == REUSE:
+                manifest.reuse(pdf_path, txt_path, previous)
+                print(f"Reused: {previous} -> {txt_path}")
+            elif convert(pdf_path, txt_path):
+                manifest.record(pdf_path, txt_path)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        manifest.close()
+
+    if skipped:
+        print(f"Up to date: {skipped} PDFs")
 
-def process_directory(root_dir):
-    """Recursively finds and converts all PDFs in a directory."""
-    for foldername, subfolders, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename.lower().endswith(".pdf"):
-                pdf_path = os.path.join(foldername, filename)
-                txt_path = os.path.splitext(pdf_path)[0] + ".txt"
-                convert_pdf_to_text(pdf_path, txt_path)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert every .pdf under a directory to .txt.")
+    parser.add_argument("directory", nargs="?", help="directory to search (prompted for if omitted)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="page ranges to extract in parallel (default: CPU count)")
+    parser.add_argument("--profile", choices=PROFILES, default=DEFAULT_PROFILE,
+                        help="fast: no layout analysis (several times faster, for indexing); "
+                             "balanced: lines and boxes without reordering; layout: full analysis (default)")
+    parser.add_argument("--force", action="store_true",
+                        help="reconvert every PDF, even ones whose .txt is up to date")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    input_dir = normalize_path_input(input("Enter the directory path: "))
+    args = parse_args()
+    input_dir = normalize_path_input(args.directory or input("Enter the directory path: "))
     
     if not os.path.isdir(input_dir):
         print("Invalid directory. Please enter a valid path.")
     else:
-        process_directory(input_dir)
+        process_directory(input_dir, force=args.force, workers=args.workers, profile=args.profile)
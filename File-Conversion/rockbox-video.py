@@ -1,6 +1,17 @@
-import subprocess
+import os
+import sys
+import time
+import shutil
+import sqlite3
+from fractions import Fraction
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
+from common.ffjobs import FFJob, run_jobs, default_workers, print_result, summarize
+from common import probe
+from common.paths import cache_dir
+
 # ---------------- PROFILES ----------------
 # Format: name, video bitrate, audio bitrate, fps, VBV buffer (bytes)
 
@@ -12,6 +23,14 @@ PROFILES = {
 
 VIDEO_EXTS = {".mp4", ".mkv", ".avi", ".mov", ".webm", ".flv", ".wmv", ".mpg", ".mpeg"}
 
+GOP = 12                      # -g 12 with no B-frames: every GOP is closed
+CHUNK_SECONDS = 300           # long videos are encoded in chunks of about this length...
+CHUNK_MIN_DURATION = 1200     # ...when they run longer than this
+
+SEQUENCE_END = b"\x00\x00\x01\xb7"
+
+QUEUE_NAME = "rockbox-video"
+
 # ------------------------------------------
 
 def normalize_path_input(value):
@@ -30,6 +49,257 @@ def ask(prompt, default=None):
     return val if val else default
 
 
+def video_args(vf, fr, vb, bufsize):
+    return [
+        # Video scaling & timing
+        "-vf", vf,
+        "-r", fr,
+
+        # Video — MPEG-1 tuned for Rockbox stability
+        "-c:v", "mpeg1video",
+        "-b:v", vb,
+        "-maxrate", vb,
+        "-bufsize", bufsize,
+        "-g", str(GOP),
+        "-bf", "0",
+        "-pix_fmt", "yuv420p",
+    ]
+
+def audio_args(ab):
+    return [
+        # Audio — MP2 (Rockbox native)
+        "-c:a", "mp2",
+        "-b:a", ab,
+        "-ar", "44100",
+        "-ac", "2",
+    ]
+
+class EncodeQueue:
+    """
+    Persistent record of every encode: source fingerprint (size, mtime), the
+    settings it was encoded with, and whether it finished. A video is only
+    skipped when its record says done with the same source and settings, so
+    a crash or a profile change re-queues exactly the affected videos.
+    """
+
+    def __init__(self, name=QUEUE_NAME):
+        # Resolved when the queue is opened, so importing the script creates nothing
+        self.db = sqlite3.connect(os.path.join(cache_dir("manifests"), f"{name}.sqlite3"), timeout=30)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS encodes (source TEXT PRIMARY KEY, output TEXT, "
+            "size INTEGER, mtime INTEGER, settings TEXT, status TEXT, updated REAL)"
+        )
+
+    def lookup(self, source):
+        return self.db.execute(
+            "SELECT output, size, mtime, settings, status FROM encodes WHERE source = ?",
+            (os.path.abspath(source),),
+        ).fetchone()
+
+    def is_done(self, source, output, st, settings_key):
+        row = self.lookup(source)
+        return (
+            row == (os.path.abspath(output), st.st_size, st.st_mtime_ns, settings_key, "done")
+            and os.path.exists(output)
+        )
+
+    def mark(self, source, output, st, settings_key, status):
+        self.db.execute(
+            "INSERT OR REPLACE INTO encodes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(source), os.path.abspath(output), st.st_size, st.st_mtime_ns,
+             settings_key, status, time.time()),
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def partial_path(out_path):
+    # Encodes go to a temporary name and are renamed into place only once complete
+    return out_path.with_name(out_path.name + ".part")
+
+def looks_complete(out_path, video):
+    """For outputs from before the queue existed: does the length match the source?"""
+    source = probe.duration(probe.probe(video))
+    encoded = probe.duration(probe.probe(out_path))
+    return source > 0 and abs(source - encoded) <= max(1.0, source * 0.01)
+
+def parse_rate(value):
+    """'500k' -> 500000."""
+    value = str(value).strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * scale)
+
+def stream_bitrate(stream):
+    try:
+        return int(stream.get("bit_rate") or 0)
+    except ValueError:
+        return 0
+
+def video_compliant(stream, settings):
+    """Already 320x240 MPEG-1 at our frame rate and within the bitrate ceiling?"""
+    vf, fr, vb, ab, bufsize = settings
+    try:
+        rate = Fraction(stream.get("avg_frame_rate") or stream.get("r_frame_rate") or "0")
+    except (ValueError, ZeroDivisionError):
+        return False
+    bitrate = stream_bitrate(stream)
+    return (
+        stream.get("codec_name") == "mpeg1video"
+        and stream.get("width") == 320
+        and stream.get("height") == 240
+        and abs(float(rate) - float(fr)) < 0.01
+        and 0 < bitrate <= parse_rate(vb)
+    )
+
+def audio_compliant(stream, settings):
+    vf, fr, vb, ab, bufsize = settings
+    bitrate = stream_bitrate(stream)
+    return (
+        stream.get("codec_name") == "mp2"
+        and str(stream.get("sample_rate")) == "44100"
+        and stream.get("channels") == 2
+        and 0 < bitrate <= parse_rate(ab)
+    )
+
+def fast_path(info, settings):
+    """
+    "remux" when the source only needs putting in an MPEG program stream,
+    "audio" when only the audio needs re-encoding, None for a full encode.
+    """
+    video = probe.streams(info, "video")
+    audio = probe.streams(info, "audio")
+    if len(video) != 1 or not video_compliant(video[0], settings):
+        return None
+    if audio and not audio_compliant(audio[0], settings):
+        return "audio"
+    return "remux"
+
+def remux_job(video, out_path, settings, reencode_audio):
+    vf, fr, vb, ab, bufsize = settings
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", str(video),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "copy",
+        *(audio_args(ab) if reencode_audio else ["-c:a", "copy"]),
+        "-f", "mpeg",
+        str(partial_path(out_path))
+    ]
+    kind = "audio only" if reencode_audio else "stream copy"
+    return FFJob(cmd, label=f"{video} [{kind}]", output=str(partial_path(out_path)), source=video,
+                 data={"final": out_path})
+
+def whole_job(video, out_path, settings):
+    vf, fr, vb, ab, bufsize = settings
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", str(video),
+        *video_args(vf, fr, vb, bufsize),
+        *audio_args(ab),
+
+        # Container
+        "-f", "mpeg",
+
+        str(partial_path(out_path))
+    ]
+    return FFJob(cmd, label=str(video), output=str(partial_path(out_path)), source=video,
+                 data={"final": out_path})
+
+
+class ChunkedEncode:
+    """
+    One long video encoded as concurrent jobs: the picture in GOP-aligned time
+    ranges, the audio once over the whole file (so there are no seams in it).
+    When every part has finished, the video chunks are joined bitstream-level
+    and muxed with the audio, all without re-encoding. Sources without an
+    audio stream get no audio job, and the join writes the picture alone.
+    """
+
+    def __init__(self, video, out_path, duration, settings, has_audio=True):
+        vf, fr, vb, ab, bufsize = settings
+        self.video = video
+        self.out_path = out_path
+        # A fixed name, so chunks left behind by a crash are cleared on the retry
+        self.work_dir = out_path.parent / f".chunks-{out_path.stem}"
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        self.work_dir.mkdir(parents=True)
+        self.failed = None
+
+        # Chunk lengths are whole GOPs, so every chunk starts on a fresh I-frame
+        # exactly where the next GOP of a single-pass encode would
+        gop_seconds = GOP / float(fr)
+        frames = max(1, round(CHUNK_SECONDS / gop_seconds)) * GOP
+        chunk_seconds = frames / float(fr)
+        count = max(1, int(-(-duration // chunk_seconds)))
+
+        self.chunks = []
+        self.jobs = []
+        for i in range(count):
+            chunk = self.work_dir / f"{i:04d}.m1v"
+            cmd = [
+                "ffmpeg", "-y",
+                "-ss", f"{i * chunk_seconds:.6f}",
+                "-i", str(video),
+                "-an",
+                *video_args(vf, fr, vb, bufsize),
+            ]
+            if i < count - 1:
+                cmd += ["-frames:v", str(frames)]
+            cmd += ["-f", "mpeg1video", str(chunk)]
+            self.chunks.append(chunk)
+            self.jobs.append(FFJob(cmd, label=f"{video} [part {i + 1}/{count}]", output=str(chunk)))
+
+        # ffmpeg fails an output with no streams, so a silent source gets no audio job
+        self.audio = self.work_dir / "audio.mp2" if has_audio else None
+        if self.audio:
+            self.jobs.append(FFJob(
+                ["ffmpeg", "-y", "-i", str(video), "-vn", *audio_args(ab), "-f", "mp2", str(self.audio)],
+                label=f"{video} [audio]", output=str(self.audio),
+            ))
+        self.remaining = len(self.jobs)
+        for job in self.jobs:
+            job.data["chunked"] = self
+
+    def part_done(self, job):
+        """
+        Called as each part finishes. Returns None while parts are still running,
+        then either the failed part (standing in for the whole video) or the
+        mux job, which the caller queues on the pool like any other job.
+        """
+        if not job.ok and self.failed is None:
+            self.failed = job
+        self.remaining -= 1
+        if self.remaining:
+            return None
+        if self.failed is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.failed.label = str(self.video)
+            self.failed.output = str(partial_path(self.out_path))
+            self.failed.source = self.video
+            self.failed.data = {"final": self.out_path}
+            return self.failed
+        return self.mux_job()
+
+    def mux_job(self):
+        # Only the last chunk keeps its sequence end code; the others are trimmed
+        # in place, so ffmpeg can read them back to back as one elementary stream
+        for chunk in self.chunks[:-1]:
+            with open(chunk, "r+b") as f:
+                f.seek(-len(SEQUENCE_END), os.SEEK_END)
+                if f.read() == SEQUENCE_END:
+                    f.truncate(f.tell() - len(SEQUENCE_END))
+
+        joined = "concat:" + "|".join(str(chunk) for chunk in self.chunks)
+        cmd = ["ffmpeg", "-y", "-fflags", "+genpts", "-f", "mpegvideo", "-i", joined]
+        if self.audio:
+            cmd += ["-i", str(self.audio), "-map", "0:v", "-map", "1:a"]
+        cmd += ["-c", "copy", "-f", "mpeg", str(partial_path(self.out_path))]
+        return FFJob(cmd, label=f"{self.video} [join]", output=str(partial_path(self.out_path)), source=self.video,
+            data={"final": self.out_path, "work_dir": self.work_dir})
+
+
 def main():
     print("\nRockbox MPEG Encoder — Maximum Stability Profile\n")
 
@@ -66,48 +336,113 @@ def main():
     print(f"Source: {src_dir}")
     print(f"Output: {out_dir}\n")
 
-    for video in src_dir.rglob("*"):
-        if video.suffix.lower() in VIDEO_EXTS:
-            out_path = out_dir / video.relative_to(src_dir)
-            out_path = out_path.with_suffix(".mpg")
-            out_path.parent.mkdir(parents=True, exist_ok=True)
+    settings = (vf, fr, vb, ab, bufsize)
+    # Everything that affects the output; a change re-queues the video
+    settings_key = f"{profile}:{mode}:{vb}:{ab}:{fr}:{bufsize}"
+    queue = EncodeQueue()
+    try:
+        run_queue(queue, src_dir, out_dir, settings, settings_key)
+    finally:
+        queue.close()
 
-            if out_path.exists():
-                print(f"Skipping: {out_path}")
-                continue
 
-            print(f"Encoding: {video}")
+def run_queue(queue, src_dir, out_dir, settings, settings_key):
+    todo = []
+    legacy = []
+    stats = {}
+    up_to_date = 0
 
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", str(video),
+    for entry in scan_files(src_dir, VIDEO_EXTS):
+        video = Path(entry.path)
+        out_path = out_dir / video.relative_to(src_dir)
+        out_path = out_path.with_suffix(".mpg")
+        stats[video] = entry.stat()
 
-                # Video scaling & timing
-                "-vf", vf,
-                "-r", fr,
-
-                # Video — MPEG-1 tuned for Rockbox stability
-                "-c:v", "mpeg1video",
-                "-b:v", vb,
-                "-maxrate", vb,
-                "-bufsize", bufsize,
-                "-g", "12",
-                "-bf", "0",
-                "-pix_fmt", "yuv420p",
-
-                # Audio — MP2 (Rockbox native)
-                "-c:a", "mp2",
-                "-b:a", ab,
-                "-ar", "44100",
-                "-ac", "2",
-
-                # Container
-                "-f", "mpeg",
-
-                str(out_path)
-            ]
+        if queue.is_done(video, out_path, stats[video], settings_key):
+            up_to_date += 1
+            continue
+
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        if out_path.exists() and queue.lookup(video) is None:
+            legacy.append((video, out_path))
+        else:
+            todo.append((video, out_path))
+
+    # Outputs from before the queue existed: keep those whose length matches the source,
+    # re-encode the rest (they're most likely truncated by an interrupted run)
+    if legacy:
+        probe.probe_many([p for pair in legacy for p in pair])
+        for video, out_path in legacy:
+            if looks_complete(out_path, video):
+                queue.mark(video, out_path, stats[video], settings_key, "done")
+                up_to_date += 1
+            else:
+                print(f"Incomplete, re-encoding: {out_path}")
+                todo.append((video, out_path))
+
+    if up_to_date:
+        print(f"Up to date: {up_to_date} videos")
+
+    if not todo:
+        print("Nothing to encode.")
+        return
+
+    for video, out_path in todo:
+        queue.mark(video, out_path, stats[video], settings_key, "pending")
+
+    infos = probe.probe_many([video for video, _ in todo])
+    jobs = []
+    results = []
+    chunked_encodes = []
+    paths = {}
+    for video, out_path in todo:
+        # Sources that are already Rockbox-ready are remuxed, or get only their audio redone
+        paths[video] = fast_path(infos[video], settings) or "encode"
+        duration = probe.duration(infos[video])
+        if paths[video] != "encode":
+            jobs.append(remux_job(video, out_path, settings, reencode_audio=paths[video] == "audio"))
+        # MPEG-1 encoding barely uses a second core, so long videos are split into
+        # chunks that share the pool with everything else
+        elif duration > CHUNK_MIN_DURATION:
+            has_audio = bool(probe.streams(infos[video], "audio"))
+            chunked_encodes.append(ChunkedEncode(video, out_path, duration, settings, has_audio))
+            jobs.extend(chunked_encodes[-1].jobs)
+        else:
+            job = whole_job(video, out_path, settings)
+            jobs.append(job)
+
+    def done(job):
+        chunked = job.data.get("chunked")
+        if chunked is not None:
+            job = chunked.part_done(job)
+            if job is None:
+                return None
+            if job.status == "pending":
+                return [job]        # the join, run on the pool instead of blocking it
+        if "work_dir" in job.data:
+            shutil.rmtree(job.data["work_dir"], ignore_errors=True)
+        if job.ok:
+            os.replace(job.output, job.data["final"])
+            job.output = str(job.data["final"])
+        queue.mark(job.source, job.data["final"], stats[job.source], settings_key, "done" if job.ok else "failed")
+        results.append(job)
+        print_result(job)
+        return None
+
+    print(f"\nEncoding {len(todo)} videos as {len(jobs)} jobs, {default_workers(len(jobs))} at a time\n")
+
+    try:
+        run_jobs(jobs, on_start=lambda job: print(f"Encoding: {job.label}"), on_done=done)
+    except KeyboardInterrupt:
+        for chunked in chunked_encodes:
+            shutil.rmtree(chunked.work_dir, ignore_errors=True)
+        raise
 
-            subprocess.run(cmd, check=True)
+    print(f"\nDone. {summarize(results)}.")
+    succeeded = [paths[job.source] for job in results if job.ok]
+    print(f"Remuxed: {succeeded.count('remux')}, "
+          f"audio re-encoded: {succeeded.count('audio')}, "
+          f"fully encoded: {succeeded.count('encode')}")
 
 
 if __name__ == "__main__":
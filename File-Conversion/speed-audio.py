@@ -1,10 +1,19 @@
 import os
-import subprocess
-import tempfile
-import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.ffjobs import FFJob, run_jobs
 
 # Common audio extensions to process
 AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".aac", ".m4a", ".ogg", ".opus", ".wma"}
+# Containers that carry cover art; it's copied across untouched
+COVER_EXTENSIONS = {".mp3", ".flac", ".m4a"}
+
+# Short clips are pushed through one ffmpeg process together so its startup cost
+# is paid once per batch instead of once per file. Bigger files run on their own.
+BATCH_FILES = 32
+BATCH_MAX_BYTES = 16 * 1024 * 1024
+TEMP_MARKER = ".speed-tmp"
 
 def normalize_path_input(value):
     value = value.strip()
@@ -13,7 +22,8 @@ def normalize_path_input(value):
     return value
 
 def is_audio_file(filename):
-    return os.path.splitext(filename)[1].lower() in AUDIO_EXTENSIONS
+    # Leftover temp files from an interrupted run aren't sources
+    return os.path.splitext(filename)[1].lower() in AUDIO_EXTENSIONS and TEMP_MARKER not in filename
 
 def build_atempo_filters(speed):
     """
@@ -34,26 +44,71 @@ def build_atempo_filters(speed):
     filters.append(f"atempo={remaining}")
     return ",".join(filters)
 
-def process_file(filepath, speed):
-    dirname, filename = os.path.split(filepath)
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp:
-        temp_path = tmp.name
-
-    atempo_filter = build_atempo_filters(speed)
-
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i", filepath,
+def temp_path(filepath):
+    """Temp output beside the source, so committing it is a rename on the same filesystem."""
+    stem, ext = os.path.splitext(filepath)
+    return f"{stem}{TEMP_MARKER}{ext}"
+
+def output_args(index, filepath, atempo_filter):
+    """Per-output options: each output takes only its own input's streams, tags and chapters."""
+    args = ["-map", f"{index}:a:0"]
+    if os.path.splitext(filepath)[1].lower() in COVER_EXTENSIONS:
+        args += ["-map", f"{index}:v?", "-c:v", "copy"]
+    args += [
+        "-map_metadata", str(index),
+        "-map_chapters", str(index),
         "-filter:a", atempo_filter,
-        temp_path
+        temp_path(filepath),
     ]
+    return args
 
-    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+def make_job(filepaths, speed):
+    """One ffmpeg process that converts every file in `filepaths`."""
+    atempo_filter = build_atempo_filters(speed)
 
-    # Replace original file
-    shutil.move(temp_path, filepath)
+    cmd = ["ffmpeg", "-y"]
+    for filepath in filepaths:
+        cmd += ["-i", filepath]
+    for index, filepath in enumerate(filepaths):
+        cmd += output_args(index, filepath, atempo_filter)
+
+    names = [os.path.basename(p) for p in filepaths]
+    label = names[0] if len(names) == 1 else f"{names[0]} (+{len(names) - 1} more)"
+    return FFJob(cmd, label=label, source=list(filepaths), outputs=[temp_path(p) for p in filepaths])
+
+def make_batches(filepaths):
+    """Groups small files up to BATCH_FILES per batch; large files get a batch of their own."""
+    batches = []
+    current = []
+    for filepath in filepaths:
+        if os.path.getsize(filepath) > BATCH_MAX_BYTES:
+            batches.append([filepath])
+            continue
+        current.append(filepath)
+        if len(current) == BATCH_FILES:
+            batches.append(current)
+            current = []
+    if current:
+        batches.append(current)
+    return batches
+
+def finish_job(job):
+    """Commits a finished job's outputs. Returns the files that need a retry on their own."""
+    if not job.ok:
+        if job.status == "failed" and len(job.source) > 1:
+            # One bad file fails the whole process; retry the batch file by file
+            print(f"Batch failed, retrying one by one: {job.label}")
+            return list(job.source)
+        print(f"Failed: {job.label}")
+        if job.stderr_tail:
+            print("    " + "\n    ".join(job.stderr_tail[-5:]))
+        return []
+
+    # Replace original files
+    for filepath, output in zip(job.source, job.outputs):
+        os.replace(output, filepath)
+        print(f"Finished: {os.path.basename(filepath)}")
+    return []
 
 def main():
     folder = normalize_path_input(input("Enter folder path containing audio files: "))
@@ -62,13 +117,31 @@ def main():
     if not os.path.isdir(folder):
         raise ValueError("Provided path is not a valid folder.")
 
-    for entry in os.listdir(folder):
+    files = []
+    for entry in sorted(os.listdir(folder)):
         path = os.path.join(folder, entry)
-        if os.path.isfile(path) and is_audio_file(entry):
-            print(f"Processing: {entry}")
-            process_file(path, speed)
-
-    print("Done.")
+        if not os.path.isfile(path) or os.path.splitext(entry)[1].lower() not in AUDIO_EXTENSIONS:
+            continue
+        if TEMP_MARKER in entry:
+            # Half-written output from an interrupted run; its source was never replaced
+            os.remove(path)
+        elif is_audio_file(entry):
+            files.append(path)
+
+    jobs = [make_job(batch, speed) for batch in make_batches(files)]
+    retry = []
+
+    def on_done(job):
+        retry.extend(finish_job(job))
+
+    run_jobs(jobs, on_start=lambda job: print(f"Processing: {job.label}"), on_done=on_done)
+    if retry:
+        jobs += run_jobs([make_job([path], speed) for path in retry],
+                         on_start=lambda job: print(f"Processing: {job.label}"), on_done=on_done)
+
+    done = sum(len(job.source) for job in jobs if job.ok)
+    failed = len(files) - done
+    print(f"Done. {done} succeeded, {failed} failed.")
 
 if __name__ == "__main__":
     main()
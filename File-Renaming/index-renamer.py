@@ -1,4 +1,8 @@
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
 
 def normalize_path_input(value):
     value = value.strip()
@@ -7,10 +11,11 @@ def normalize_path_input(value):
     return value
 
 def rename_index_files(root_dir: str) -> None:
-    for current_dir, _, files in os.walk(root_dir):
-        if "index.html" in files:
+    for entry in scan_files(root_dir, {".html"}):
+        if entry.name == "index.html":
+            current_dir = os.path.dirname(entry.path)
             parent_folder = os.path.basename(current_dir)
-            old_path = os.path.join(current_dir, "index.html")
+            old_path = entry.path
 
             new_filename = f"z - {parent_folder}.html"
             new_path = os.path.join(current_dir, new_filename)
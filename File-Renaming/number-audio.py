@@ -1,12 +1,15 @@
 import os
-import glob
+import sys
 import re
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
+
 # Supported audio + video extensions
-MEDIA_EXTENSIONS = [
-    '*.mp3', '*.wav', '*.flac', '*.aac', '*.ogg', '*.m4a',   # audio
-    '*.mp4', '*.mkv', '*.avi', '*.mov', '*.wmv', '*.flv', '*.webm'  # video
-]
+MEDIA_EXTENSIONS = {
+    '.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a',   # audio
+    '.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm'  # video
+}
 
 def normalize_path_input(value):
     value = value.strip()
@@ -15,14 +18,12 @@ def normalize_path_input(value):
     return value
 
 def prepend_numbers_to_media_files(folder_path, start_number):
-    media_files = []
-
-    # Collect all matching files
-    for ext in MEDIA_EXTENSIONS:
-        media_files.extend(glob.glob(os.path.join(folder_path, ext)))
+    # Collect all matching files in one pass
+    entries = list(scan_files(folder_path, MEDIA_EXTENSIONS, recursive=False))
 
-    # Sort by creation time (change to getmtime for modified time)
-    media_files.sort(key=os.path.getctime)
+    # Sort by creation time (change to st_mtime for modified time)
+    entries.sort(key=lambda entry: entry.stat().st_ctime)
+    media_files = [entry.path for entry in entries]
 
     # Pattern for already-numbered files
     number_pattern = re.compile(r'^\d{3} - ')
@@ -1,8 +1,15 @@
-import subprocess
+import os
+import sys
 import pathlib
-import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
+from common.ffjobs import FFJob, run_jobs
+from common.probe import probe, tags
+from common.titletag import TagError, read_title, write_title
 
 VIDEO_EXTENSIONS = {".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv"}
+TEMP_MARKER = ".title-tmp"
 
 def normalize_path_input(value):
     value = value.strip()
@@ -10,11 +17,24 @@ def normalize_path_input(value):
         return value[1:-1].strip()
     return value
 
-def update_title(video_path: pathlib.Path):
-    title = video_path.stem
+def current_title(video_path: pathlib.Path):
+    """Reads the title from the container header, or via ffprobe for formats titletag can't parse."""
+    try:
+        return read_title(str(video_path))
+    except (TagError, OSError, IndexError, ValueError):
+        return tags(probe(video_path)).get("title", "")
+
+def retitle_in_place(video_path: pathlib.Path):
+    """True if the header was rewritten in place, False if the file needs a remux."""
+    try:
+        return write_title(str(video_path), video_path.stem)
+    except (TagError, OSError, IndexError, ValueError):
+        return False
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=video_path.suffix) as tmp:
-        temp_path = pathlib.Path(tmp.name)
+def make_title_job(video_path: pathlib.Path):
+    title = video_path.stem
+    # Beside the source, so the final replace is a rename on the same filesystem
+    temp_path = video_path.with_name(f"{video_path.stem}{TEMP_MARKER}{video_path.suffix}")
 
     cmd = [
         "ffmpeg",
@@ -26,22 +46,16 @@ def update_title(video_path: pathlib.Path):
         str(temp_path)
     ]
 
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace"
-    )
-
-    if result.returncode != 0:
-        print(f"\nFFmpeg failed on: {video_path}")
-        print(result.stderr)
-        temp_path.unlink(missing_ok=True)
+    return FFJob(cmd, label=video_path.name, output=str(temp_path), source=video_path)
+
+def finish_title_job(job):
+    if not job.ok:
+        print(f"\nFFmpeg failed on: {job.source}")
+        print(job.error_text())
         return False
 
-    temp_path.replace(video_path)
-    print(f"Updated: {video_path.name}")
+    pathlib.Path(job.output).replace(job.source)
+    print(f"Updated: {job.label}")
     return True
 
 def main():
@@ -52,14 +66,35 @@ def main():
         print("Invalid folder path.")
         return
 
+    jobs = []
     count = 0
+    skipped = 0
+    in_place = 0
+
+    for entry in scan_files(base_path, VIDEO_EXTENSIONS):
+        video_path = pathlib.Path(entry.path)
+        if TEMP_MARKER in video_path.name:
+            # Half-written remux from an interrupted run; its source was never replaced
+            video_path.unlink(missing_ok=True)
+            continue
+        if current_title(video_path) == video_path.stem:
+            skipped += 1
+        elif retitle_in_place(video_path):
+            print(f"Updated: {video_path.name}")
+            in_place += 1
+            count += 1
+        else:
+            jobs.append(make_title_job(video_path))
+
+    def on_done(job):
+        nonlocal count
+        if finish_title_job(job):
+            count += 1
 
-    for video in base_path.rglob("*"):
-        if video.suffix.lower() in VIDEO_EXTENSIONS:
-            if update_title(video):
-                count += 1
+    run_jobs(jobs, on_done=on_done)
 
-    print(f"\nDone. Updated {count} video files.")
+    print(f"\nDone. Updated {count} video files ({in_place} in place, {count - in_place} remuxed); "
+          f"{skipped} already had the right title.")
 
 if __name__ == "__main__":
     main()
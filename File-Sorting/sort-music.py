@@ -1,11 +1,13 @@
 import os
+import sys
 import shutil
-from mutagen import File
-from mutagen.easyid3 import EasyID3
 import string
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scan import scan_files
+
 # Accepted audio formats
-AUDIO_EXTENSIONS = ('.mp3', '.flac', '.m4a', '.aac', '.ogg', '.wav')
+AUDIO_EXTENSIONS = {'.mp3', '.flac', '.m4a', '.aac', '.ogg', '.wav'}
 
 def sanitize_filename(name):
     # Remove characters not allowed in filenames
@@ -13,6 +15,8 @@ def sanitize_filename(name):
     return ''.join(c for c in name if c in valid_chars).strip()
 
 def get_audio_metadata(filepath):
+    from mutagen import File
+
     try:
         audio = File(filepath, easy=True)
         if not audio:
@@ -29,32 +33,31 @@ def get_audio_metadata(filepath):
 
 
 def organize_audio_files(source_dir, destination_dir):
-    for root, _, files in os.walk(source_dir):
-        for file in files:
-            if file.lower().endswith(AUDIO_EXTENSIONS):
-                full_path = os.path.join(root, file)
-                metadata = get_audio_metadata(full_path)
-
-                if not metadata:
-                    print(f"Skipping (no metadata): {full_path}")
-                    continue
-
-                artist, album, title = metadata
-                dest_folder = os.path.join(destination_dir, artist, album)
-                os.makedirs(dest_folder, exist_ok=True)
-
-                ext = os.path.splitext(file)[1]
-                new_filename = f"{title}{ext}"
-                dest_path = os.path.join(dest_folder, new_filename)
-
-                counter = 1
-                while os.path.exists(dest_path):
-                    new_filename = f"{title}_{counter}{ext}"
-                    dest_path = os.path.join(dest_folder, new_filename)
-                    counter += 1
-
-                shutil.move(full_path, dest_path)
-                print(f"Moved: {file} → {dest_path}")
+    for entry in scan_files(source_dir, AUDIO_EXTENSIONS):
+        file = entry.name
+        full_path = entry.path
+        metadata = get_audio_metadata(full_path)
+
+        if not metadata:
+            print(f"Skipping (no metadata): {full_path}")
+            continue
+
+        artist, album, title = metadata
+        dest_folder = os.path.join(destination_dir, artist, album)
+        os.makedirs(dest_folder, exist_ok=True)
+
+        ext = os.path.splitext(file)[1]
+        new_filename = f"{title}{ext}"
+        dest_path = os.path.join(dest_folder, new_filename)
+
+        counter = 1
+        while os.path.exists(dest_path):
+            new_filename = f"{title}_{counter}{ext}"
+            dest_path = os.path.join(dest_folder, new_filename)
+            counter += 1
+
+        shutil.move(full_path, dest_path)
+        print(f"Moved: {file} → {dest_path}")
 
 # Example usage
 source_directory = r"C:\Users\SrulC\Downloads\Telegram Desktop"
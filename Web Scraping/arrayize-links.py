@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 import sys
 
 def main():
@@ -7,6 +6,8 @@ def main():
     # Read multiline HTML input from stdin
     html_input = sys.stdin.read()
 
+    from bs4 import BeautifulSoup
+
     # Parse the HTML
     soup = BeautifulSoup(html_input, 'html.parser')
 
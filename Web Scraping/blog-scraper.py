@@ -1,26 +1,34 @@
 import os
-import time
-import requests
-from bs4 import BeautifulSoup
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.httpclient import Client
+from common.httpcache import ResponseCache
+from common.htmltext import make_soup
+from common.manifest import OutputMap
 
 BASE_URL = 'https://www.brandonsanderson.com'
 BLOG_URL = f'{BASE_URL}/blogs/blog'
 OUTPUT_DIR = r"C:\Users\Srulik's User\Downloads\ytdlp downloads\sanderson_blog_posts"
 
+# Be polite to the server: at most one request per second. Pages are cached
+# on disk, so re-runs only re-download what changed (UTILS_HTTP_OFFLINE=1
+# re-runs the extraction against the cache alone)
+client = Client(rates={"www.brandonsanderson.com": 1}, cache=ResponseCache())
+
 # Create the output directory if it doesn't exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Get blog post links from a single page
 def get_blog_posts(page_url):
-    response = requests.get(page_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    response = client.get(page_url)
+    soup = make_soup(response.text)
     posts = soup.select('div.blog-item__title-holder a')
     return [BASE_URL + post['href'] for post in posts]
 
-# Extract the title, date, and content of a post
-def get_post_content(post_url):
-    response = requests.get(post_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
+# Extract the title, date, and content of a fetched post
+def get_post_content(post_url, response):
+    soup = make_soup(response.text)
 
     # Extract slug from URL to use as fallback title
     url_slug = post_url.rstrip('/').split('/')[-1]
@@ -64,11 +72,13 @@ def save_post(title, content, index):
 
     with open(filepath, 'w', encoding='utf-8') as f:
         f.write(content)
+    return filepath
 
 
 # Main scraping loop
 def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
+    saved = OutputMap("blog-scraper")  # post URL -> file it was saved to
 
     index = 1  # for filename numbering
 
@@ -84,15 +94,21 @@ def main():
         for post_url in post_urls:
             try:
                 print(f"  Fetching post: {post_url}")
-                title, content = get_post_content(post_url)
-                save_post(title, content, index)
+                response = client.get(post_url)
+
+                # Unchanged since the last run and already saved under this index: skip the parse
+                previous = saved.get(post_url)
+                if response.unchanged and previous and os.path.basename(previous).startswith(f"{index:03d} - "):
+                    print(f"  Unchanged: {previous}")
+                    index += 1
+                    continue
+
+                title, content = get_post_content(post_url, response)
+                saved.record(post_url, save_post(title, content, index))
                 index += 1
-                time.sleep(1)  # Be polite to the server
             except Exception as e:
                 print(f"  Failed to process {post_url}: {e}")
 
-        time.sleep(2)
-
 
 if __name__ == '__main__':
     main()
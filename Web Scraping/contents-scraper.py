@@ -1,6 +1,10 @@
 import os
-import requests
-from bs4 import BeautifulSoup
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.httpclient import Client
+from common.httpcache import ResponseCache
+from common.htmltext import links as html_links, select_text
 
 # Base site URL for full link construction
 BASE_URL = "https://www.photopea.com/"  # Replace with actual site
@@ -57,9 +61,10 @@ HTML_SNIPPET = """<li class="lvl0"><a href="/learn/">Introduction</a></li>
 OUTPUT_DIR = r"C:\Users\Srulik's User\Downloads\ytdlp downloads\scraped_pages"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+client = Client(cache=ResponseCache())
+
 # Parse links from the HTML snippet
-soup = BeautifulSoup(HTML_SNIPPET, 'html.parser')
-links = [(a['href'], a.text.strip()) for a in soup.find_all('a', href=True)]
+links = html_links(HTML_SNIPPET)
 
 # Scrape each link
 for href, title in links:
@@ -70,14 +75,17 @@ for href, title in links:
     print(f"Scraping {full_url}...")
 
     try:
-        res = requests.get(full_url)
+        res = client.get(full_url)
         res.raise_for_status()
 
-        page_soup = BeautifulSoup(res.text, 'html.parser')
+        if res.unchanged and os.path.exists(filepath):
+            print(f"Unchanged: {filepath}")
+            continue
 
-        # Try to extract content - you can refine the tag used here
-        main = page_soup.find('main') or page_soup.find('article') or page_soup.body
-        text = main.get_text(separator='\n', strip=True) if main else 'No content found.'
+        # Try to extract content - you can refine the selectors used here
+        text = select_text(res.text, ['main', 'article', 'body'], separator='\n', strip=True)
+        if text is None:
+            text = 'No content found.'
 
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(f"{title}\n\n{text}")
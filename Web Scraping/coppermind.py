@@ -1,11 +1,10 @@
 import os
+import sys
 import time
 import re
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.htmltext import make_soup
 
 BASE_URL = "http://crawl.chaosforge.org"
 ALL_PAGES_URL = f"{BASE_URL}/Special:AllPages"
@@ -26,6 +25,12 @@ def mark_as_downloaded(title):
         f.write(title + "\n")
 
 def get_driver():
+    # Selenium and the driver manager are slow to import; only load them when a browser is needed
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
+
     options = Options()
     options.add_argument("--start-maximized")
     # options.add_argument("--headless=new")  # Uncomment if you want headless mode
@@ -38,7 +43,7 @@ def get_all_article_links(driver):
 
     while True:
         time.sleep(2)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        soup = make_soup(driver.page_source)
         page_links = soup.select("#mw-content-text ul li a")
         for a in page_links:
             href = a.get("href")
@@ -58,7 +63,7 @@ def get_all_article_links(driver):
 def download_article_selenium(driver, url):
     driver.get(url)
     time.sleep(2)
-    soup = BeautifulSoup(driver.page_source, "html.parser")
+    soup = make_soup(driver.page_source)
     title_tag = soup.find("h1", id="firstHeading")
     content_tag = soup.find("div", class_="mw-parser-output")
     category_links = soup.select("#mw-normal-catlinks ul li a")
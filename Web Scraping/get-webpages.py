@@ -1,9 +1,14 @@
 import os
 import re
-import requests
-from bs4 import BeautifulSoup
+import sys
 import ast
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.httpclient import Client
+from common.httpcache import ResponseCache
+from common.htmltext import get_text, select_text
+from common.manifest import OutputMap
+
 def normalize_path_input(value):
     value = value.strip()
     if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
@@ -64,18 +69,26 @@ def clean_filename(title):
     return title.strip()[:100] or "untitled"
 
 def fetch_and_save(urls, directory):
+    client = Client(cache=ResponseCache())
+    saved = OutputMap("get-webpages")  # URL -> file it was saved to
     used_filenames = set()
 
     for url in urls:
         try:
             print(f"Fetching: {url}")
-            response = requests.get(url)
+            response = client.get(url)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            text = soup.get_text()
+            # Unchanged since it was last saved into this directory: skip the parse
+            previous = saved.get(url)
+            if response.unchanged and previous and os.path.dirname(previous) == os.path.abspath(directory):
+                used_filenames.add(os.path.basename(previous))
+                print(f"Unchanged: {previous}")
+                continue
+
+            text = get_text(response.text)
 
-            title_tag = soup.title.string if soup.title and soup.title.string else "untitled"
+            title_tag = select_text(response.text, "title") or "untitled"
             filename_base = clean_filename(title_tag)
 
             filename = filename_base + ".txt"
@@ -88,6 +101,7 @@ def fetch_and_save(urls, directory):
             filepath = os.path.join(directory, filename)
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(text)
+            saved.record(url, filepath)
             print(f"Saved text to {filepath}")
 
         except Exception as e:
@@ -1,14 +1,18 @@
 import csv
 import os
-import time
-import requests
+import sys
 from typing import Dict, Optional
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.httpclient import Client
+
 SCRYFALL_API_BASE = "https://api.scryfall.com"
-REQUEST_DELAY = 0.1  # seconds (Scryfall recommends max 10 requests/sec)
+SCRYFALL_RATE = 10  # requests/sec (Scryfall recommends max 10 requests/sec)
 
 OUTPUT_DIR = r"C:\Users\SrulC\Downloads\MTG Images"  # fixed output folder
 
+client = Client(rates={"api.scryfall.com": SCRYFALL_RATE})
+
 def normalize_path_input(value: str) -> str:
     value = value.strip()
     if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
@@ -30,14 +34,14 @@ def read_csv(path: str):
 
 def fetch_card_by_id(scryfall_id: str) -> Optional[Dict]:
     url = f"{SCRYFALL_API_BASE}/cards/{scryfall_id}"
-    r = requests.get(url)
+    r = client.get(url)
     return r.json() if r.ok else None
 
 
 def fetch_card_by_oracle_id(oracle_id: str) -> Optional[Dict]:
     url = f"{SCRYFALL_API_BASE}/cards/search"
     params = {"q": f"oracleid:{oracle_id}"}
-    r = requests.get(url, params=params)
+    r = client.get(url, params=params)
     if not r.ok:
         return None
     data = r.json()
@@ -47,7 +51,7 @@ def fetch_card_by_oracle_id(oracle_id: str) -> Optional[Dict]:
 def fetch_card_by_name(name: str) -> Optional[Dict]:
     url = f"{SCRYFALL_API_BASE}/cards/named"
     params = {"exact": name}
-    r = requests.get(url, params=params)
+    r = client.get(url, params=params)
     return r.json() if r.ok else None
 
 
@@ -69,7 +73,7 @@ def sanitize_filename(text: str) -> str:
 
 
 def download_image(url: str, filepath: str) -> None:
-    r = requests.get(url, stream=True)
+    r = client.get(url, stream=True)
     r.raise_for_status()
     with open(filepath, "wb") as f:
         for chunk in r.iter_content(8192):
@@ -129,8 +133,6 @@ def main():
         except Exception as e:
             print("Failed:", os.path.basename(filepath), e)
 
-        time.sleep(REQUEST_DELAY)
-
 
 if __name__ == "__main__":
     main()
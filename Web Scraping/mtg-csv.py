@@ -1,11 +1,16 @@
 import csv
-import time
+import os
+import sys
 import logging
-import requests
 from typing import Dict, Optional
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.httpclient import Client
+
 SCRYFALL_API_BASE = "https://api.scryfall.com"
-REQUEST_DELAY = 0.1  # seconds (max 10 req/sec per Scryfall)
+SCRYFALL_RATE = 10  # requests/sec (max 10 req/sec per Scryfall)
+
+client = Client(rates={"api.scryfall.com": SCRYFALL_RATE})
 
 # ---------------------------------------------------------------------
 # Logging configuration
@@ -39,7 +44,7 @@ def read_csv(path: str):
 
 def fetch_card_by_id(scryfall_id: str) -> Optional[Dict]:
     logger.debug("Fetching card by Scryfall ID: %s", scryfall_id)
-    r = requests.get(f"{SCRYFALL_API_BASE}/cards/{scryfall_id}")
+    r = client.get(f"{SCRYFALL_API_BASE}/cards/{scryfall_id}")
     if not r.ok:
         logger.warning(
             "Failed to fetch card by Scryfall ID %s (HTTP %s)",
@@ -52,7 +57,7 @@ def fetch_card_by_id(scryfall_id: str) -> Optional[Dict]:
 
 def fetch_card_by_oracle_id(oracle_id: str) -> Optional[Dict]:
     logger.debug("Fetching card by Oracle ID: %s", oracle_id)
-    r = requests.get(
+    r = client.get(
         f"{SCRYFALL_API_BASE}/cards/search",
         params={"q": f"oracleid:{oracle_id}"},
     )
@@ -74,7 +79,7 @@ def fetch_card_by_oracle_id(oracle_id: str) -> Optional[Dict]:
 
 def fetch_card_by_name(name: str) -> Optional[Dict]:
     logger.debug("Fetching card by exact name: %s", name)
-    r = requests.get(
+    r = client.get(
         f"{SCRYFALL_API_BASE}/cards/named",
         params={"exact": name},
     )
@@ -153,8 +158,6 @@ def main():
                 card.get("name", "<unknown>"),
             )
 
-            time.sleep(REQUEST_DELAY)
-
     logger.info(
         "Processing complete. Rows processed: %d, PNG URLs written: %d",
         processed,
@@ -1,17 +1,11 @@
 import os
+import sys
 import time
 import re
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
 
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.edge.options import Options as EdgeOptions
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.htmltext import make_soup
 
 BASE_URL = "https://rpgbot.net/dnd5/"
 SAVE_ROOT = r"C:\Users\SrulC\Downloads\YTDLP Downloads\RPGbot"
@@ -23,6 +17,12 @@ def sanitize_filename(name):
     return re.sub(r'[\\/*?:"<>|]', "_", name)
 
 def get_driver():
+    # Selenium and the driver manager are slow to import; only load them when a browser is needed
+    from selenium import webdriver
+    from selenium.webdriver.edge.service import Service as EdgeService
+    from selenium.webdriver.edge.options import Options as EdgeOptions
+    from webdriver_manager.microsoft import EdgeChromiumDriverManager
+
     options = EdgeOptions()
     options.add_argument("--start-maximized")
     # Uncomment this if you want headless mode:
@@ -60,6 +60,10 @@ def save_article(url, title, content):
     print(f"Saved: {full_path}")
 
 def scrape_page(driver, url):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     if url in visited:
         return
     visited.add(url)
@@ -76,7 +80,7 @@ def scrape_page(driver, url):
         except:
             print(f"Timeout waiting for main content on {url}")
 
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        soup = make_soup(driver.page_source)
 
         title_tag = soup.find("h1")
         content_tag = soup.find("main") or soup.find("article")
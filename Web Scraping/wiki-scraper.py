@@ -1,12 +1,18 @@
 import os
-import requests
-from bs4 import BeautifulSoup
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.httpclient import Client
+from common.httpcache import ResponseCache
+from common.htmltext import links as html_links, select_text
 
 # Base URL and paths
 BASE_URL = "http://crawl.chaosforge.org"
 ALL_PAGES_HTML = "all pages.html" # Replace with your local file path
 OUTPUT_DIR = "C:\\Users\\Srulik's User\\OneDrive\\Documents\\crawl wiki"
 
+client = Client(cache=ResponseCache())
+
 def clean_html(file_path):
     """Extract valid HTML content from a file."""
     with open(file_path, "rb") as file:
@@ -25,31 +31,35 @@ def normalize_url(href):
 def fetch_and_save_content(url, base_directory):
     """Fetch and save the content of a page, preserving its full directory structure."""
     try:
-        # Fetch page content
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        content_div = soup.find("div", {"id": "mw-content-text"})
-        if not content_div:
-            print(f"No content found for {url}")
-            return
-        text_content = content_div.get_text(separator="\n", strip=True)
-
         # Extract the full path from the URL
         path_parts = url.replace(BASE_URL, "").strip("/").split("/")
-        
-        # Recreate the full directory structure
         directory_path = os.path.join(base_directory, *path_parts[:-1])
-        os.makedirs(directory_path, exist_ok=True)
-        
+
         # Save the file with the last part of the path as filename
         filename = path_parts[-1] if len(path_parts) > 0 else "index"
         if not filename.endswith(".html"): # Ensure valid extension
             filename += ".txt"
         else:
             filename = filename.replace(".html", ".txt")
-        
         filepath = os.path.join(directory_path, filename)
+
+        # Fetch page content
+        response = client.get(url)
+        response.raise_for_status()
+
+        # Unchanged since the last run and already saved: skip the parse
+        if response.unchanged and os.path.exists(filepath):
+            print(f"Unchanged: {filepath}")
+            return
+
+        text_content = select_text(response.text, "div#mw-content-text", separator="\n", strip=True)
+        if text_content is None:
+            print(f"No content found for {url}")
+            return
+
+        # Recreate the full directory structure
+        os.makedirs(directory_path, exist_ok=True)
+
         with open(filepath, "w", encoding="utf-8") as file:
             file.write(text_content)
         print(f"Saved: {filepath}")
@@ -62,11 +72,10 @@ def scrape_all_pages(file_path, output_dir):
     if not cleaned_html:
         print("Failed to clean the input file.")
         return
-    soup = BeautifulSoup(cleaned_html, "html.parser")
-    links = soup.find_all("a", href=True)
+    links = html_links(cleaned_html)
     visited = set()
-    for link in links:
-        href = normalize_url(link["href"])
+    for link, _ in links:
+        href = normalize_url(link)
         if href and href not in visited:
             visited.add(href)
             page_name = href.split("/")[-1]
@@ -0,0 +1 @@
+"""Helpers shared by the scripts. Scripts add the repo root to sys.path to import these."""
@@ -0,0 +1,92 @@
+"""
+Minimal streaming EPUB reader.
+
+Reads only what text extraction needs straight from the zip: the container,
+the OPF package document, and the spine's XHTML documents in reading order,
+one at a time. Images, fonts and stylesheets are never loaded, so memory
+stays around one chapter regardless of how illustrated the book is.
+"""
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from urllib.parse import unquote
+
+CONTAINER_PATH = "META-INF/container.xml"
+DOCUMENT_TYPES = {"application/xhtml+xml", "text/html", "application/xml", "text/xml"}
+
+
+class EpubError(Exception):
+    pass
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find_all(root, name):
+    return [el for el in root.iter() if _local(el.tag) == name]
+
+
+def _opf_path(zf):
+    try:
+        container = ET.fromstring(zf.read(CONTAINER_PATH))
+    except KeyError:
+        # Some generators skip the container; fall back to the first .opf in the archive
+        for name in zf.namelist():
+            if name.lower().endswith(".opf"):
+                return name
+        raise EpubError("no container.xml or .opf package document")
+    for rootfile in _find_all(container, "rootfile"):
+        path = rootfile.get("full-path")
+        if path:
+            return path
+    raise EpubError("container.xml names no package document")
+
+
+def _resolve(zf, base, href):
+    href = unquote(href.split("#", 1)[0])
+    name = posixpath.normpath(posixpath.join(base, href))
+    try:
+        zf.getinfo(name)
+        return name
+    except KeyError:
+        pass
+    # Zip entry names are case-sensitive but some books get the case wrong
+    lowered = name.lower()
+    for candidate in zf.namelist():
+        if candidate.lower() == lowered:
+            return candidate
+    return None
+
+
+def spine_names(zf):
+    """Returns the archive names of the spine's documents, in reading order."""
+    opf_path = _opf_path(zf)
+    opf = ET.fromstring(zf.read(opf_path))
+    base = posixpath.dirname(opf_path)
+
+    manifest = {}
+    for item in _find_all(opf, "item"):
+        manifest[item.get("id")] = (item.get("href"), item.get("media-type", ""))
+
+    names = []
+    seen = set()
+    for itemref in _find_all(opf, "itemref"):
+        href, media_type = manifest.get(itemref.get("idref"), (None, None))
+        if not href or media_type not in DOCUMENT_TYPES:
+            continue
+        name = _resolve(zf, base, href)
+        if name and name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def iter_spine(epub_path):
+    """Yields (archive name, raw XHTML bytes) for each spine document, one at a time."""
+    try:
+        with zipfile.ZipFile(epub_path) as zf:
+            for name in spine_names(zf):
+                yield name, zf.read(name)
+    except (zipfile.BadZipFile, ET.ParseError) as e:
+        raise EpubError(str(e)) from e
@@ -0,0 +1,219 @@
+"""
+Bounded-parallel ffmpeg runner.
+
+Scripts build a list of FFJob command specs and hand them to run_jobs, which
+runs a few ffmpeg processes at once, splits the CPU's threads between them,
+keeps the tail of each job's stderr, and stops everything cleanly on Ctrl+C.
+"""
+import os
+import time
+import threading
+import subprocess
+from collections import deque
+
+CPU_COUNT = os.cpu_count() or 1
+
+# Encoders already use a few threads each, so run about half as many jobs as cores
+DEFAULT_WORKERS = max(1, CPU_COUNT // 2)
+STDERR_TAIL = 20
+
+
+class FFJob:
+    """One ffmpeg (or ffprobe) invocation plus its outcome once run_jobs returns."""
+
+    def __init__(self, cmd, label=None, output=None, source=None, outputs=None, data=None):
+        self.cmd = list(cmd)
+        self.label = label or (str(output) if output else " ".join(self.cmd[:3]))
+        self.output = output          # removed if the job fails or is cancelled
+        self.source = source          # the input file (or list of them), for scripts that post-process results
+        # Every file the job writes, for commands with several outputs; all removed on failure
+        self.outputs = list(outputs) if outputs is not None else [output]
+        self.data = data if data is not None else {}   # whatever the script needs in on_done
+        self.returncode = None
+        self.stderr_tail = []
+        self.elapsed = 0.0
+        self.status = "pending"       # pending / ok / failed / cancelled
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    def error_text(self):
+        return "\n".join(self.stderr_tail)
+
+
+def default_workers(job_count=None):
+    workers = DEFAULT_WORKERS
+    if job_count is not None:
+        workers = min(workers, job_count)
+    return max(1, workers)
+
+
+def prepare_cmd(cmd, threads, outputs=None):
+    """
+    Adds -nostdin (parallel jobs must not fight over the console) and a -threads
+    budget. -threads is an output option, so it goes before each of `outputs`
+    found in the command, or before the last argument if none are.
+    """
+    cmd = list(cmd)
+    if os.path.splitext(os.path.basename(cmd[0]))[0].lower() != "ffmpeg":
+        return cmd
+    if "-nostdin" not in cmd:
+        cmd.insert(1, "-nostdin")
+    if threads and "-threads" not in cmd:
+        targets = {str(o) for o in outputs or () if o is not None}
+        positions = [i for i, arg in enumerate(cmd) if arg in targets and cmd[i - 1] != "-i"]
+        for i in reversed(positions or [len(cmd) - 1]):
+            cmd[i:i] = ["-threads", str(threads)]
+    return cmd
+
+
+def remove_partial(path):
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class _Runner:
+    def __init__(self, threads):
+        self.threads = threads
+        self.lock = threading.Lock()
+        self.running = set()
+        self.cancelled = threading.Event()
+
+    def run(self, job):
+        if self.cancelled.is_set():
+            job.status = "cancelled"
+            return job
+
+        tail = deque(maxlen=STDERR_TAIL)
+        start = time.perf_counter()
+        try:
+            proc = subprocess.Popen(
+                prepare_cmd(job.cmd, self.threads, job.outputs),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except OSError as e:
+            job.status = "failed"
+            job.stderr_tail = [f"Could not start {job.cmd[0]}: {e}"]
+            return job
+        with self.lock:
+            self.running.add(proc)
+        try:
+            for line in proc.stderr:
+                tail.append(line.rstrip())
+            job.returncode = proc.wait()
+        finally:
+            with self.lock:
+                self.running.discard(proc)
+
+        job.elapsed = time.perf_counter() - start
+        job.stderr_tail = list(tail)
+        if self.cancelled.is_set():
+            job.status = "cancelled"
+        else:
+            job.status = "ok" if job.returncode == 0 else "failed"
+        if not job.ok:
+            for output in job.outputs:
+                remove_partial(output)
+        return job
+
+    def cancel(self):
+        self.cancelled.set()
+        with self.lock:
+            procs = list(self.running)
+        for proc in procs:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+
+
+def _finish(on_done, job):
+    """Runs on_done; if it raises, the job is marked failed instead of stopping the whole run."""
+    try:
+        return on_done(job)
+    except Exception as e:
+        job.status = "failed"
+        job.stderr_tail.append(f"Error finishing {job.label}: {e}")
+        print(f"⚠️ Error finishing {job.label}: {e}")
+        return None
+
+
+def run_jobs(jobs, workers=None, on_start=None, on_done=None):
+    """
+    Runs the jobs with at most `workers` concurrent processes and returns them.
+
+    on_start(job) and on_done(job) are called from the calling thread, so
+    scripts can print progress without extra locking. An exception in on_done
+    marks that job failed and the run carries on. on_done may return a list of
+    follow-up jobs (e.g. a final mux once every part is encoded); they are run
+    next on the same pool and added to the returned list. On Ctrl+C all running
+    processes are terminated, their partial outputs removed, and
+    KeyboardInterrupt is re-raised.
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    jobs = list(jobs)
+    if not jobs:
+        return jobs
+
+    workers = workers or default_workers(len(jobs))
+    runner = _Runner(threads=max(1, CPU_COUNT // workers))
+    pending = deque(jobs)
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    running = set()
+    try:
+        # Submit lazily so on_start really reflects when a job begins
+        while True:
+            while len(running) < workers:
+                if not pending:
+                    break
+                job = pending.popleft()
+                if on_start:
+                    on_start(job)
+                running.add(pool.submit(runner.run, job))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                if on_done:
+                    follow_ups = _finish(on_done, future.result())
+                    if follow_ups:
+                        jobs.extend(follow_ups)
+                        pending.extendleft(reversed(follow_ups))
+    except KeyboardInterrupt:
+        print("\nCancelling running ffmpeg jobs...")
+        runner.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        for job in jobs:
+            if job.status == "pending":
+                job.status = "cancelled"
+        raise
+    finally:
+        pool.shutdown(wait=True)
+
+    return jobs
+
+
+def print_result(job):
+    if job.ok:
+        print(f"✅ Created: {job.output or job.label}")
+    elif job.status == "failed":
+        print(f"⚠️ Failed to create: {job.output or job.label}")
+        if job.stderr_tail:
+            print("    " + "\n    ".join(job.stderr_tail[-5:]))
+
+
+def summarize(jobs):
+    ok = sum(1 for job in jobs if job.ok)
+    failed = sum(1 for job in jobs if job.status == "failed")
+    return f"{ok} succeeded, {failed} failed"
@@ -0,0 +1,395 @@
+"""
+HTML-to-text extraction with interchangeable parsers.
+
+get_text / select_text / links behave like the BeautifulSoup calls the
+scripts used to make (text nodes joined in document order, script, style
+and template contents and comments left out), but run on the fastest
+parser installed:
+
+    selectolax  C parser (lexbor), fastest
+    lxml        C parser
+    stdlib      html.parser tokenizer without building a tree; the same
+                tokenizer bs4's 'html.parser' builder uses, so output matches it
+    bs4         BeautifulSoup(..., 'html.parser'), the reference
+
+Set UTILS_HTML_BACKEND to force one. Scripts that need the full
+BeautifulSoup API should use make_soup, which picks the fastest tree
+builder bs4 has available.
+
+Bytes are decoded once, by as_text, with the encoding the page declares
+(BOM, XML declaration or <meta charset>) so every backend sees the same text.
+
+Selectors are simple compound selectors only: tag, #id, .class, tag#id,
+tag.class.
+"""
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+
+# bs4 keeps these strings out of get_text too (as Script, Stylesheet, RubyTextString...)
+SKIP_TAGS = {"script", "style", "template", "rt", "rp"}
+# rt and rp end tags are optional: the next ruby part or the end of the ruby closes them
+RUBY_TEXT_TAGS = {"rt", "rp"}
+RUBY_PART_TAGS = {"rb", "rt", "rtc", "rp"}
+PREFERENCE = ["selectolax", "lxml", "stdlib"]
+
+_SELECTOR = re.compile(r"^([a-zA-Z][\w-]*)?(?:#([\w-]+))?((?:\.[\w-]+)*)$")
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),      # before UTF-16 LE, whose BOM is its prefix
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_XML_ENCODING = re.compile(rb"""^\s*<\?xml[^>]*?encoding\s*=\s*["']?([\w.:-]+)""")
+_META_CHARSET = re.compile(rb"""<meta[^>]*?charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+
+
+def parse_selector(selector):
+    match = _SELECTOR.match(selector.strip())
+    if not match:
+        raise ValueError(f"Unsupported selector: {selector!r}")
+    tag, id_, classes = match.groups()
+    return (tag or "").lower() or None, id_, [c for c in classes.split(".") if c]
+
+
+def join_strings(strings, separator="", strip=False):
+    if strip:
+        strings = (s.strip() for s in strings)
+        strings = (s for s in strings if s)
+    return separator.join(strings)
+
+
+def sniff_encoding(data):
+    """
+    Encoding of an HTML/XHTML byte string: BOM, then an XML declaration,
+    then a <meta charset> (or http-equiv content) in the first 4 KB, else None.
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding
+    # UTF-16 without a BOM still starts with '<' and a NUL byte
+    if data[:2] == b"<\x00":
+        return "utf-16-le"
+    if data[:2] == b"\x00<":
+        return "utf-16-be"
+    head = data[:4096]
+    match = _XML_ENCODING.match(head) or _META_CHARSET.search(head)
+    if match:
+        try:
+            encoding = codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            return None
+        # A UTF-16/32 declaration in an 8-bit document is wrong (the BOM or NULs would show it)
+        return None if encoding.startswith(("utf-16", "utf-32")) else encoding
+    return None
+
+
+def as_text(html):
+    """Decodes bytes using the declared encoding, falling back to UTF-8 and then windows-1252 like bs4."""
+    if not isinstance(html, bytes):
+        return html
+    declared = sniff_encoding(html)
+    for encoding in filter(None, (declared, "utf-8")):
+        try:
+            return html.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+    return html.decode("windows-1252", errors="replace")
+
+
+# ---------------- stdlib ----------------
+
+class _Matcher:
+    def __init__(self, selector):
+        self.tag, self.id, self.classes = parse_selector(selector)
+        self.open_tag = None   # tag name of the matched element, to find its end tag
+        self.depth = 0
+        self.parts = None      # None until the first match starts, then filled once
+
+    def matches(self, tag, attrs):
+        if self.tag and tag != self.tag:
+            return False
+        attrs = dict(attrs)
+        if self.id and attrs.get("id") != self.id:
+            return False
+        if self.classes:
+            have = (attrs.get("class") or "").split()
+            return all(c in have for c in self.classes)
+        return True
+
+
+class _TextCollector(HTMLParser):
+    """Single pass over the tokens, collecting text for the whole page or for selectors."""
+
+    def __init__(self, selectors=None):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.ruby_text_open = False
+        self.matchers = [_Matcher(s) for s in selectors] if selectors else None
+        self.active = []
+        self.parts = []
+        self.anchors = []
+        self.anchor = None
+
+    def close_ruby_text(self):
+        if self.ruby_text_open:
+            self.ruby_text_open = False
+            self.skip_depth -= 1
+
+    def handle_starttag(self, tag, attrs):
+        if tag in RUBY_PART_TAGS:
+            self.close_ruby_text()
+            self.ruby_text_open = tag in RUBY_TEXT_TAGS
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        if tag == "a":
+            href = dict(attrs).get("href")
+            self.anchor = [href, []] if href is not None else None
+            if self.anchor:
+                self.anchors.append(self.anchor)
+        if self.matchers:
+            for m in self.matchers:
+                if m in self.active:
+                    if tag == m.open_tag:
+                        m.depth += 1
+                elif m.parts is None and m.matches(tag, attrs):
+                    m.parts = []
+                    m.open_tag = tag
+                    m.depth = 1
+                    self.active.append(m)
+
+    def handle_startendtag(self, tag, attrs):
+        # Void elements (<br/>, <img/>) never open a skip region or a match
+        if tag == "a":
+            return
+        if self.matchers:
+            for m in self.matchers:
+                if m.parts is None and m not in self.active and m.matches(tag, attrs):
+                    m.parts = []
+
+    def handle_endtag(self, tag):
+        if tag in RUBY_PART_TAGS or tag == "ruby":
+            self.close_ruby_text()
+        elif tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        if tag == "a":
+            self.anchor = None
+        for m in list(self.active):
+            if tag == m.open_tag:
+                m.depth -= 1
+                if m.depth <= 0:
+                    self.active.remove(m)
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        self.parts.append(data)
+        if self.anchor:
+            self.anchor[1].append(data)
+        for m in self.active:
+            m.parts.append(data)
+
+
+def _stdlib_text(html, selectors, separator, strip):
+    collector = _TextCollector(selectors)
+    collector.feed(as_text(html))
+    collector.close()
+    if not selectors:
+        return join_strings(collector.parts, separator, strip)
+    for m in collector.matchers:
+        if m.parts is not None:
+            return join_strings(m.parts, separator, strip)
+    return None
+
+
+def _stdlib_links(html):
+    collector = _TextCollector()
+    collector.feed(as_text(html))
+    collector.close()
+    return [(href, "".join(parts).strip()) for href, parts in collector.anchors]
+
+
+# ---------------- lxml ----------------
+
+def _lxml_root(html):
+    import lxml.html
+
+    # Decoded by as_text so every backend agrees on the charset; libxml2's
+    # own sniffing misses XML declarations
+    data = as_text(html).encode("utf-8")
+    return lxml.html.document_fromstring(data, parser=lxml.html.HTMLParser(encoding="utf-8"))
+
+
+def _lxml_strings(el):
+    if not isinstance(el.tag, str):          # comments, processing instructions
+        return
+    if el.tag.lower() in SKIP_TAGS:
+        return
+    if el.text:
+        yield el.text
+    for child in el:
+        yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_xpath(selector):
+    tag, id_, classes = parse_selector(selector)
+    path = f"//{tag or '*'}"
+    if id_:
+        path += f"[@id='{id_}']"
+    for c in classes:
+        path += f"[contains(concat(' ', normalize-space(@class), ' '), ' {c} ')]"
+    return path
+
+
+def _lxml_text(html, selectors, separator, strip):
+    try:
+        root = _lxml_root(html)
+    except Exception:
+        # lxml refuses empty or unparseable documents; treat them as empty like bs4
+        return "" if not selectors else None
+    if not selectors:
+        return join_strings(_lxml_strings(root), separator, strip)
+    for selector in selectors:
+        found = root.xpath(_lxml_xpath(selector))
+        if found:
+            return join_strings(_lxml_strings(found[0]), separator, strip)
+    return None
+
+
+def _lxml_links(html):
+    try:
+        root = _lxml_root(html)
+    except Exception:
+        return []
+    return [(a.get("href"), join_strings(_lxml_strings(a)).strip()) for a in root.iter("a") if a.get("href") is not None]
+
+
+# ---------------- selectolax ----------------
+
+def _selectolax_tree(html):
+    # The lexbor engine; selectolax 1.0 removed the old selectolax.parser (Modest) one
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(as_text(html))
+    tree.strip_tags(list(SKIP_TAGS))
+    return tree
+
+
+def _selectolax_strings(node):
+    # Text nodes in document order; joined by join_strings so strip drops
+    # whitespace-only nodes the way bs4 does (lexbor's own text() keeps them)
+    for child in node.traverse(include_text=True):
+        if child.tag == "-text":
+            yield child.text_content
+
+
+def _selectolax_text(html, selectors, separator, strip):
+    tree = _selectolax_tree(html)
+    if not selectors:
+        node = tree.root
+        return join_strings(_selectolax_strings(node), separator, strip) if node else ""
+    for selector in selectors:
+        node = tree.css_first(selector)
+        if node is not None:
+            return join_strings(_selectolax_strings(node), separator, strip)
+    return None
+
+
+def _selectolax_links(html):
+    tree = _selectolax_tree(html)
+    return [(a.attributes.get("href"), a.text(deep=True).strip())
+            for a in tree.css("a[href]")]
+
+
+# ---------------- bs4 ----------------
+
+def _bs4_text(html, selectors, separator, strip):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    if not selectors:
+        return soup.get_text(separator=separator, strip=strip)
+    for selector in selectors:
+        node = soup.select_one(selector)
+        if node is not None:
+            return node.get_text(separator=separator, strip=strip)
+    return None
+
+
+def _bs4_links(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return [(a["href"], a.get_text().strip()) for a in soup.find_all("a", href=True)]
+
+
+# ---------------- dispatch ----------------
+
+BACKENDS = {
+    "selectolax": (_selectolax_text, _selectolax_links, "selectolax.lexbor"),
+    "lxml": (_lxml_text, _lxml_links, "lxml.html"),
+    "stdlib": (_stdlib_text, _stdlib_links, None),
+    "bs4": (_bs4_text, _bs4_links, "bs4"),
+}
+
+_chosen = None
+
+
+def is_available(name):
+    module = BACKENDS[name][2]
+    if module is None:
+        return True
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends():
+    return [name for name in BACKENDS if is_available(name)]
+
+
+def backend():
+    """Name of the backend in use: UTILS_HTML_BACKEND if set and installed, else the fastest installed."""
+    global _chosen
+    if _chosen is None:
+        forced = os.environ.get("UTILS_HTML_BACKEND")
+        if forced in BACKENDS and is_available(forced):
+            _chosen = forced
+        else:
+            _chosen = next(name for name in PREFERENCE if is_available(name))
+    return _chosen
+
+
+def get_text(html, separator="", strip=False, using=None):
+    """Equivalent of BeautifulSoup(html).get_text(separator, strip)."""
+    return BACKENDS[using or backend()][0](html, None, separator, strip)
+
+
+def select_text(html, selectors, separator="", strip=False, using=None):
+    """
+    Text of the first element matching the first selector that matches
+    anything (tried in order, like `soup.find(a) or soup.find(b)`), or None.
+    """
+    if isinstance(selectors, str):
+        selectors = [selectors]
+    return BACKENDS[using or backend()][0](html, list(selectors), separator, strip)
+
+
+def links(html, using=None):
+    """(href, link text) for every <a href> in document order."""
+    return BACKENDS[using or backend()][1](html)
+
+
+def make_soup(html):
+    """BeautifulSoup using the fastest tree builder installed (lxml, else html.parser)."""
+    from bs4 import BeautifulSoup
+
+    features = "lxml" if is_available("lxml") else "html.parser"
+    return BeautifulSoup(html, features)
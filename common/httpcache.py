@@ -0,0 +1,139 @@
+"""
+On-disk HTTP response cache for the scrapers.
+
+Bodies are stored gzip-compressed under their SHA-256, so pages with
+identical content share one file. A small SQLite index maps each URL to
+its body and the validators (ETag / Last-Modified) needed to revalidate
+it. Used through Client(cache=ResponseCache()).
+"""
+import os
+import gzip
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+from common.paths import cache_dir
+
+
+class CacheEntry:
+    def __init__(self, url, digest, status, headers, encoding, etag, last_modified, fetched):
+        self.url = url
+        self.digest = digest
+        self.status = status
+        self.headers = headers
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched = fetched
+
+
+class ResponseCache:
+    def __init__(self, directory=None):
+        self.directory = directory or cache_dir("http")
+        self.bodies = os.path.join(self.directory, "bodies")
+        os.makedirs(self.bodies, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(
+            os.path.join(self.directory, "index.sqlite3"), timeout=30, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, digest TEXT, status INTEGER, "
+            "headers TEXT, encoding TEXT, etag TEXT, last_modified TEXT, fetched REAL)"
+        )
+
+    def body_path(self, digest):
+        return os.path.join(self.bodies, digest[:2], digest + ".gz")
+
+    def lookup(self, url):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT url, digest, status, headers, encoding, etag, last_modified, fetched "
+                "FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        entry = CacheEntry(*row)
+        entry.headers = json.loads(entry.headers)
+        if not os.path.exists(self.body_path(entry.digest)):
+            return None
+        return entry
+
+    def read_body(self, entry):
+        with gzip.open(self.body_path(entry.digest), "rb") as f:
+            return f.read()
+
+    def store(self, url, response):
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.body_path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp, path)
+
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    digest,
+                    response.status_code,
+                    json.dumps(dict(response.headers)),
+                    response.encoding,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    time.time(),
+                ),
+            )
+            self.db.commit()
+
+    # Headers a 304 may carry that replace the stored ones (RFC 9111 section 4.3.4)
+    REVALIDATION_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "Expires", "Date", "Vary",
+                            "Content-Location")
+
+    def revalidated(self, entry, response):
+        """Records a 304: merges its validators and headers into the entry and stores them."""
+        for name in self.REVALIDATION_HEADERS:
+            value = response.headers.get(name)
+            if value is not None:
+                stored = next((k for k in entry.headers if k.lower() == name.lower()), name)
+                entry.headers[stored] = value
+        entry.etag = response.headers.get("ETag") or entry.etag
+        entry.last_modified = response.headers.get("Last-Modified") or entry.last_modified
+        entry.fetched = time.time()
+        with self.lock:
+            self.db.execute(
+                "UPDATE responses SET headers = ?, etag = ?, last_modified = ?, fetched = ? WHERE url = ?",
+                (json.dumps(entry.headers), entry.etag, entry.last_modified, entry.fetched, entry.url),
+            )
+            self.db.commit()
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def response(self, entry):
+        """Rebuilds a requests.Response from a cache entry."""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+
+        response = requests.Response()
+        response.status_code = entry.status
+        response.reason = "OK"
+        response.url = entry.url
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.encoding = entry.encoding
+        response._content = self.read_body(entry)
+        response.from_cache = True
+        response.unchanged = False
+        return response
@@ -0,0 +1,188 @@
+"""
+Pooled, rate-limited HTTP client for the scrapers.
+
+A single requests.Session keeps connections alive between requests, and a
+token bucket per host spaces requests out. Time spent waiting on the
+previous response counts towards the gap, so a slow server isn't also
+slept on. 429 and 5xx responses are retried with backoff, honoring
+Retry-After when the server sends it.
+
+With cache=ResponseCache(), GETs are stored on disk and revalidated with
+If-None-Match / If-Modified-Since, so unchanged pages come back as a 304.
+Set UTILS_HTTP_OFFLINE=1 to serve only from the cache and never touch the
+network.
+"""
+import os
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_WAIT = 300  # never sleep longer than this on a single Retry-After
+
+
+def offline_mode():
+    return os.environ.get("UTILS_HTTP_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            wait = (1 - self.tokens) / self.rate
+            # Reserve the token now so concurrent callers queue up behind us
+            self.tokens -= 1
+        time.sleep(wait)
+
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Client:
+    """
+    Drop-in for the requests.get calls in the scrapers.
+
+    rates maps host -> requests per second; default_rate applies to any other
+    host (None means unlimited). pool_size is the number of keep-alive
+    connections kept per host. Responses served from the cache have
+    from_cache set, and unchanged set when the server confirmed with a 304
+    that the cached copy is current (so callers may skip re-parsing it).
+    """
+
+    def __init__(self, rates=None, default_rate=None, pool_size=10, retries=3,
+                 backoff=1.0, timeout=30, headers=None, cache=None, offline=None):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.cache = cache
+        self.offline = offline_mode() if offline is None else offline
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self._session = None
+
+    @property
+    def session(self):
+        # requests is imported on first use so scripts can prompt before paying for it
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(self.headers)
+            self._session = session
+        return self._session
+
+    def limiter(self, host):
+        with self._lock:
+            if host not in self._limiters:
+                rate = self.rates.get(host, self.default_rate)
+                self._limiters[host] = RateLimiter(rate) if rate else None
+            return self._limiters[host]
+
+    def request(self, method, url, **kwargs):
+        if self.cache is not None and method == "GET" and not kwargs.get("stream"):
+            return self._cached_get(url, **kwargs)
+        if self.offline:
+            import requests
+            raise requests.ConnectionError(f"Offline mode: {method} {url} is not cacheable")
+        response = self._send(method, url, **kwargs)
+        response.from_cache = response.unchanged = False
+        return response
+
+    def _cached_get(self, url, **kwargs):
+        import requests
+
+        params = kwargs.pop("params", None)
+        key = requests.Request("GET", url, params=params).prepare().url
+        entry = self.cache.lookup(key)
+
+        if self.offline:
+            if entry is None:
+                raise requests.ConnectionError(f"Offline mode: {key} is not in the cache")
+            return self.cache.response(entry)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            headers.update(self.cache.conditional_headers(entry))
+
+        response = self._send("GET", key, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidated(entry, response)
+            cached = self.cache.response(entry)
+            cached.unchanged = True
+            return cached
+
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        response.from_cache = response.unchanged = False
+        return response
+
+    def _send(self, method, url, **kwargs):
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        limiter = self.limiter(urlsplit(url).hostname)
+
+        for attempt in range(self.retries + 1):
+            if limiter:
+                limiter.acquire()
+
+            last_try = attempt == self.retries
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_try:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or last_try:
+                return response
+
+            wait = retry_after_seconds(response)
+            if wait is None:
+                wait = self.backoff * 2 ** attempt
+            response.close()
+            time.sleep(min(wait, MAX_RETRY_WAIT))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
@@ -0,0 +1,127 @@
+"""
+Incremental conversion manifest.
+
+Remembers, per converter, each source file's size, mtime, content hash and
+the converter version that produced its output. Unchanged sources are
+skipped from a single lookup; sources that were renamed or moved are found
+by hash and get the existing output moved or copied instead of being
+converted again.
+
+OutputMap is the lighter version for scripts whose sources aren't files
+(the scrapers): it only remembers which output each key (a URL) last
+produced, so an unchanged page can be skipped without parsing it again.
+"""
+import os
+import shutil
+import hashlib
+import sqlite3
+
+from common.paths import cache_dir
+
+HASH_CHUNK = 1 << 20
+
+SKIP = "skip"        # output is current
+REUSE = "reuse"      # same content was converted before under another name
+CONVERT = "convert"  # new or changed
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, name, version):
+        self.version = str(version)
+        self.db = sqlite3.connect(os.path.join(cache_dir("manifests"), f"{name}.sqlite3"), timeout=30)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (source TEXT PRIMARY KEY, output TEXT, "
+            "size INTEGER, mtime INTEGER, hash TEXT, version TEXT)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_hash ON entries (hash)")
+        self._hashes = {}
+
+    def plan(self, source, output, st=None):
+        """
+        Decides what to do with one source. Returns (action, previous_output);
+        previous_output is only set for REUSE.
+        """
+        source = os.path.abspath(source)
+        output = os.path.abspath(output)
+        st = st or os.stat(source)
+
+        row = self.db.execute(
+            "SELECT output, size, mtime, hash, version FROM entries WHERE source = ?", (source,)
+        ).fetchone()
+        if row and row[4] == self.version and row[0] == output and os.path.exists(output):
+            if row[1] == st.st_size and row[2] == st.st_mtime_ns:
+                return SKIP, None
+
+        # Stat changed or never seen here: fall back to the content hash
+        digest = file_hash(source)
+        self._hashes[source] = digest
+
+        if row and row[3] == digest and row[4] == self.version and row[0] == output and os.path.exists(output):
+            self.record(source, output, st)   # touched but not modified
+            return SKIP, None
+
+        for previous, in self.db.execute(
+            "SELECT output FROM entries WHERE hash = ? AND version = ? AND source != ?",
+            (digest, self.version, source),
+        ):
+            if previous != output and os.path.exists(previous):
+                return REUSE, previous
+
+        return CONVERT, None
+
+    def reuse(self, source, output, previous_output):
+        """Puts an existing conversion in place for a renamed or moved source."""
+        source = os.path.abspath(source)
+        output = os.path.abspath(output)
+        old = self.db.execute(
+            "SELECT source FROM entries WHERE output = ?", (previous_output,)
+        ).fetchone()
+
+        if old and not os.path.exists(old[0]):
+            # The original source is gone, so its output can simply follow it
+            os.replace(previous_output, output)
+            self.db.execute("DELETE FROM entries WHERE source = ?", (old[0],))
+        else:
+            shutil.copy2(previous_output, output)
+        self.record(source, output)
+
+    def record(self, source, output, st=None):
+        source = os.path.abspath(source)
+        st = st or os.stat(source)
+        digest = self._hashes.pop(source, None) or file_hash(source)
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (source, os.path.abspath(output), st.st_size, st.st_mtime_ns, digest, self.version),
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+class OutputMap:
+    def __init__(self, name):
+        self.db = sqlite3.connect(os.path.join(cache_dir("manifests"), f"{name}.sqlite3"), timeout=30)
+        self.db.execute("CREATE TABLE IF NOT EXISTS outputs (key TEXT PRIMARY KEY, output TEXT)")
+
+    def get(self, key):
+        """The output last recorded for key, or None if there is none or it no longer exists."""
+        row = self.db.execute("SELECT output FROM outputs WHERE key = ?", (key,)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def record(self, key, output):
+        self.db.execute("INSERT OR REPLACE INTO outputs VALUES (?, ?)", (key, os.path.abspath(output)))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,19 @@
+"""Where the scripts keep their caches and manifests."""
+import os
+import sys
+
+
+def cache_dir(*parts):
+    """
+    Returns (and creates) a directory under the per-user cache folder.
+    Set UTILS_CACHE_DIR to keep the caches somewhere else.
+    """
+    base = os.environ.get("UTILS_CACHE_DIR")
+    if not base:
+        if sys.platform == "win32":
+            base = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "utils")
+        else:
+            base = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "utils")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,75 @@
+"""
+Layout-free PDF text extraction for pdf-txt's "fast" profile.
+
+pdfminer's own converters build an LTChar object (with a bounding box and
+font metrics) for every glyph, even with laparams=None, and that dominates
+extraction time. StreamTextDevice instead writes each glyph's text as the
+content stream draws it, inferring line breaks and spaces from the glyph
+origins. Text comes out in content-stream order, which is what search
+indexing needs but not what a reader expects from multi-column pages.
+
+Imports pdfminer at module level, so import this lazily.
+"""
+from pdfminer.pdfdevice import PDFTextDevice
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.pdfpage import PDFPage
+
+WORD_GAP = 0.15   # horizontal gap, in ems, that counts as a space
+LINE_GAP = 0.5    # vertical jump, in ems, that starts a new line
+
+
+class StreamTextDevice(PDFTextDevice):
+    def __init__(self, rsrcmgr):
+        super().__init__(rsrcmgr)
+        self.parts = []
+        self.last_y = None
+        self.last_end = None
+        self.last_space = True
+
+    def begin_page(self, page, ctm):
+        super().begin_page(page, ctm)
+        self.last_y = self.last_end = None
+        self.last_space = True
+
+    def end_page(self, page):
+        self.parts.append("\n\f")   # same page separator extract_text uses
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+        advance = font.char_width(cid) * fontsize * scaling
+        a, b, c, d, x, y = matrix
+        em = fontsize * (abs(d) or abs(a) or 1)
+
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            return advance
+
+        if self.last_y is not None:
+            if abs(y - self.last_y) > em * LINE_GAP:
+                self.parts.append("\n")
+                self.last_space = True
+            elif x - self.last_end > em * WORD_GAP and not self.last_space:
+                self.parts.append(" ")
+
+        self.parts.append(text)
+        self.last_y = y
+        self.last_end = x + advance * a
+        self.last_space = text.isspace()
+        return advance
+
+    def text(self):
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+
+def extract_stream_text(pdf_path, page_numbers=None):
+    """Text of the given pages (0-based; all when None) without layout analysis."""
+    resources = PDFResourceManager(caching=True)
+    device = StreamTextDevice(resources)
+    interpreter = PDFPageInterpreter(resources, device)
+    with open(pdf_path, "rb") as f:
+        for page in PDFPage.get_pages(f, page_numbers, caching=True):
+            interpreter.process_page(page)
+    return device.text()
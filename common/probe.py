@@ -0,0 +1,133 @@
+"""
+Cached ffprobe.
+
+One `ffprobe -show_format -show_streams -show_chapters` call answers every
+question the scripts ask about a media file. Results are kept in a SQLite
+cache keyed by path and invalidated when the file's size or mtime changes,
+so re-running a script over unchanged files spawns no ffprobe at all.
+"""
+import os
+import json
+import sqlite3
+import threading
+import subprocess
+
+from common.paths import cache_dir
+
+CACHE_NAME = "probe.sqlite3"
+
+_db = None
+_db_lock = threading.Lock()
+
+
+def _connect():
+    global _db
+    if _db is None:
+        # Opened (and the cache folder created) on first use, not at import
+        _db = sqlite3.connect(os.path.join(cache_dir(), CACHE_NAME), timeout=30, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS probes "
+            "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, data TEXT)"
+        )
+    return _db
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _cached(path, size, mtime):
+    with _db_lock:
+        try:
+            row = _connect().execute(
+                "SELECT size, mtime, data FROM probes WHERE path = ?", (path,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+    if row and row[0] == size and row[1] == mtime:
+        return json.loads(row[2])
+    return None
+
+
+def _store(path, size, mtime, info):
+    with _db_lock:
+        try:
+            db = _connect()
+            db.execute(
+                "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)",
+                (path, size, mtime, json.dumps(info)),
+            )
+            db.commit()
+        except sqlite3.Error:
+            pass
+
+
+def run_ffprobe(path):
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        "-show_chapters",
+        path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+
+def probe(path):
+    """Returns ffprobe's format/streams/chapters JSON for path, or {} if it can't be probed."""
+    path = os.path.abspath(os.fspath(path))
+    try:
+        size, mtime = _fingerprint(path)
+    except OSError:
+        return {}
+
+    info = _cached(path, size, mtime)
+    if info is not None:
+        return info
+
+    info = run_ffprobe(path)
+    if info is None:
+        return {}
+    _store(path, size, mtime, info)
+    return info
+
+
+def probe_many(paths, workers=8):
+    """Probes several files concurrently. Returns {path: info} in the order given."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths) or 1))) as pool:
+        return dict(zip(paths, pool.map(probe, paths)))
+
+
+# ---------------- accessors ----------------
+
+def duration(info):
+    try:
+        return float(info.get("format", {}).get("duration", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def tags(info):
+    """Format-level tags with lowercased keys (containers disagree on case)."""
+    return {k.lower(): v for k, v in info.get("format", {}).get("tags", {}).items()}
+
+
+def chapters(info):
+    return info.get("chapters", [])
+
+
+def streams(info, codec_type=None):
+    return [s for s in info.get("streams", []) if codec_type is None or s.get("codec_type") == codec_type]
@@ -0,0 +1,77 @@
+"""
+Fast directory scanning.
+
+One os.scandir pass per directory, extension matching through a set, and the
+returned os.DirEntry objects keep their stat results, so callers don't pay
+for a second listing or stat.
+"""
+import os
+
+# Listing is I/O-bound, so parallel scans can use more threads than cores
+PARALLEL_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+def normalize_exts(exts):
+    if exts is None:
+        return None
+    return {e.lower() if e.startswith(".") else "." + e.lower() for e in exts}
+
+
+def list_dir(path, exts):
+    """Returns (matching file entries, subdirectory paths) for one directory."""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and (exts is None or os.path.splitext(entry.name)[1].lower() in exts):
+                        files.append(entry)
+                except OSError:
+                    continue
+    except OSError as e:
+        print(f"Cannot read {path}: {e}")
+    return files, subdirs
+
+
+def scan_files(root, exts=None, recursive=True, parallel=False):
+    """
+    Yields an os.DirEntry for every file under root whose extension is in exts
+    (any file if exts is None).
+
+    Each directory is listed completely before its files are yielded, so
+    callers may rename or create files as they go. With parallel=True,
+    subtrees are listed on a thread pool and files come back in no particular
+    order.
+    """
+    exts = normalize_exts(exts)
+    root = os.fspath(root)
+
+    if not recursive:
+        yield from list_dir(root, exts)[0]
+        return
+
+    if parallel:
+        yield from _scan_parallel(root, exts)
+        return
+
+    pending = [root]
+    while pending:
+        files, subdirs = list_dir(pending.pop(), exts)
+        yield from files
+        pending.extend(reversed(subdirs))
+
+
+def _scan_parallel(root, exts):
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    with ThreadPoolExecutor(max_workers=PARALLEL_WORKERS) as pool:
+        running = {pool.submit(list_dir, root, exts)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                running.update(pool.submit(list_dir, d, exts) for d in subdirs)
+                yield from files
@@ -0,0 +1,451 @@
+"""
+Read and rewrite a video's title tag in place.
+
+MP4/MOV keep the title in moov/udta (an iTunes-style meta/ilst "©nam"
+item, or a QuickTime "©nam" string); Matroska/WebM keep it in the
+segment's Info/Title. Both live in a header that is tiny next to the media
+data, so the title can be changed by rewriting that header alone, as long
+as the new header fits in the old one plus any adjacent padding (free/skip
+boxes for MP4, Void elements for Matroska). write_title reports when it
+doesn't fit so the caller can fall back to a full remux.
+
+Only the header is ever read, so read_title is cheap enough to run over a
+whole library before deciding what to touch.
+"""
+import os
+import zlib
+import struct
+
+MP4_EXTS = {".mp4", ".m4v", ".mov", ".m4a", ".3gp"}
+MKV_EXTS = {".mkv", ".webm", ".mka"}
+
+MP4_PADDING = {b"free", b"skip"}
+MP4_CONTAINERS = {b"moov", b"udta", b"ilst"}
+NAM = b"\xa9nam"
+
+
+class TagError(Exception):
+    """The file isn't a container we can edit, or its header is malformed."""
+
+
+def read_title(path):
+    """Returns the file's title tag ('' if it has none)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in MP4_EXTS:
+        return _mp4_read_title(path)
+    if ext in MKV_EXTS:
+        return _mkv_read_title(path)
+    raise TagError(f"unsupported container: {ext}")
+
+
+def write_title(path, title):
+    """Sets the title in place. Returns False when there's no room and the file needs a remux."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in MP4_EXTS:
+        return _mp4_write_title(path, title)
+    if ext in MKV_EXTS:
+        return _mkv_write_title(path, title)
+    raise TagError(f"unsupported container: {ext}")
+
+
+# ---------------- MP4 / MOV ----------------
+
+def _mp4_top_level(f, file_size):
+    """Yields (type, offset, header_size, total_size) for each top-level box."""
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        size, kind = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size or offset + size > file_size:
+            raise TagError(f"bad {kind!r} box at {offset}")
+        yield kind, offset, header_size, size
+        offset += size
+
+
+def _mp4_children(data):
+    """Parses a run of boxes into [type, payload] lists."""
+    boxes = []
+    pos = 0
+    while pos + 8 <= len(data):
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[pos + 8:pos + 16])[0]
+            header_size = 16
+        elif size == 0:
+            size = len(data) - pos
+        if size < header_size or pos + size > len(data):
+            raise TagError(f"bad {kind!r} box")
+        boxes.append([kind, data[pos + header_size:pos + size]])
+        pos += size
+    return boxes
+
+
+def _mp4_box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _mp4_join(boxes):
+    return b"".join(_mp4_box(kind, payload) for kind, payload in boxes)
+
+
+def _meta_split(payload):
+    """meta is a full box in MP4 but a plain container in some QuickTime files."""
+    if payload[4:8] == b"hdlr":
+        return b"", payload
+    return payload[:4], payload[4:]
+
+
+def _find(boxes, kind):
+    for box in boxes:
+        if box[0] == kind:
+            return box
+    return None
+
+
+def _mp4_load(path):
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        boxes = list(_mp4_top_level(f, file_size))
+        ftyp = next((b for b in boxes if b[0] == b"ftyp"), None)
+        brand = b""
+        if ftyp:
+            f.seek(ftyp[1] + ftyp[2])
+            brand = f.read(4)
+        for i, (kind, offset, header_size, size) in enumerate(boxes):
+            if kind == b"moov":
+                f.seek(offset + header_size)
+                payload = f.read(size - header_size)
+                return boxes, i, brand, payload
+    raise TagError("no moov box")
+
+
+def _ilst_title(ilst):
+    item = _find(_mp4_children(ilst), NAM)
+    if item is None:
+        return None
+    data = _find(_mp4_children(item[1]), b"data")
+    return data[1][8:].decode("utf-8", errors="replace") if data else None
+
+
+def _mp4_read_title(path):
+    _, _, _, moov = _mp4_load(path)
+    udta = _find(_mp4_children(moov), b"udta")
+    if udta is None:
+        return ""
+    children = _mp4_children(udta[1])
+    meta = _find(children, b"meta")
+    if meta is not None:
+        _, inner = _meta_split(meta[1])
+        ilst = _find(_mp4_children(inner), b"ilst")
+        if ilst is not None:
+            title = _ilst_title(ilst[1])
+            if title is not None:
+                return title
+    nam = _find(children, NAM)
+    if nam is not None and len(nam[1]) >= 4:
+        length = struct.unpack(">H", nam[1][:2])[0]
+        return nam[1][4:4 + length].decode("utf-8", errors="replace")
+    return ""
+
+
+def _ilst_item(title):
+    data = _mp4_box(b"data", struct.pack(">II", 1, 0) + title.encode("utf-8"))
+    return [NAM, data]
+
+
+def _qt_string(title):
+    encoded = title.encode("utf-8")
+    return struct.pack(">HH", len(encoded), 0x55C4) + encoded   # 0x55C4: language "und"
+
+
+def _mp4_new_moov(moov, title, quicktime):
+    """Rebuilds the moov payload with the new title, dropping free/skip padding inside it."""
+    children = [b for b in _mp4_children(moov) if b[0] not in MP4_PADDING]
+    udta = _find(children, b"udta")
+    if udta is None:
+        udta = [b"udta", b""]
+        children.append(udta)
+    udta_children = [b for b in _mp4_children(udta[1]) if b[0] not in MP4_PADDING]
+
+    updated = False
+    meta = _find(udta_children, b"meta")
+    if meta is not None:
+        prefix, inner = _meta_split(meta[1])
+        meta_children = _mp4_children(inner)
+        ilst = _find(meta_children, b"ilst")
+        if ilst is not None:
+            items = [b for b in _mp4_children(ilst[1]) if b[0] != NAM]
+            items.insert(0, _ilst_item(title))
+            ilst[1] = _mp4_join(items)
+            meta[1] = prefix + _mp4_join(meta_children)
+            updated = True
+
+    nam = _find(udta_children, NAM)
+    if nam is not None:
+        nam[1] = _qt_string(title)
+        updated = True
+
+    if not updated:
+        if quicktime:
+            udta_children.append([NAM, _qt_string(title)])
+        else:
+            hdlr = _mp4_box(b"hdlr", b"\0" * 8 + b"mdirappl" + b"\0" * 9)
+            ilst = _mp4_box(b"ilst", _mp4_join([_ilst_item(title)]))
+            udta_children.append([b"meta", b"\0" * 4 + hdlr + ilst])
+
+    udta[1] = _mp4_join(udta_children)
+    return _mp4_box(b"moov", _mp4_join(children))
+
+
+def _mp4_write_title(path, title):
+    boxes, index, brand, moov = _mp4_load(path)
+    _, offset, _, size = boxes[index]
+    new_moov = _mp4_new_moov(moov, title, quicktime=brand == b"qt  ")
+
+    last = index == len(boxes) - 1
+    budget = size
+    if index + 1 < len(boxes) and boxes[index + 1][0] in MP4_PADDING:
+        budget += boxes[index + 1][3]
+
+    with open(path, "r+b") as f:
+        if last:
+            # Nothing follows moov, so it can simply grow or shrink at the end of the file
+            f.seek(offset)
+            f.write(new_moov)
+            f.truncate()
+        else:
+            spare = budget - len(new_moov)
+            if spare != 0 and spare < 8:
+                return False          # no room, or a gap too small for a free box
+            f.seek(offset)
+            f.write(new_moov + (_mp4_box(b"free", b"\0" * (spare - 8)) if spare else b""))
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+
+# ---------------- Matroska / WebM ----------------
+
+EBML_ID = 0x1A45DFA3
+SEGMENT = 0x18538067
+SEEKHEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TITLE = 0x7BA9
+VOID = 0xEC
+CRC32 = 0xBF
+CLUSTER = 0x1F43B675
+
+HEADER_SCAN = 1 << 20   # Info is expected well within the first MB, before the first cluster
+
+
+def _vint(data, pos, keep_marker):
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise TagError("bad EBML variable-length integer")
+    value = first if keep_marker else first & (mask - 1)
+    for b in data[pos + 1:pos + length]:
+        value = (value << 8) | b
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def _element(data, pos):
+    """Returns (id, data_start, data_size or None if unknown, header_size)."""
+    element_id, id_len, _ = _vint(data, pos, keep_marker=True)
+    size, size_len, unknown = _vint(data, pos + id_len, keep_marker=False)
+    return element_id, pos + id_len + size_len, None if unknown else size, id_len + size_len
+
+
+def _encode_id(element_id):
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+
+
+def _encode_size(size, length=None):
+    if length is None:
+        length = 1
+        while size >= (1 << (7 * length)) - 1:
+            length += 1
+    if length > 8 or size >= (1 << (7 * length)) - 1:
+        raise TagError("size does not fit")
+    return (size | (1 << (7 * length))).to_bytes(length, "big")
+
+
+def _ebml(element_id, payload, size_length=None):
+    return _encode_id(element_id) + _encode_size(len(payload), size_length) + payload
+
+
+def _void(total):
+    """A Void element exactly `total` bytes long (total >= 2)."""
+    for size_length in range(1, 9):
+        payload = total - 1 - size_length
+        if 0 <= payload < (1 << (7 * size_length)) - 1:
+            return _ebml(VOID, b"\0" * payload, size_length)
+    raise TagError("void does not fit")
+
+
+def _children(data, start, end):
+    pos = start
+    while pos < end:
+        element_id, data_start, size, _ = _element(data, pos)
+        if size is None:
+            return
+        yield element_id, pos, data_start, size
+        pos = data_start + size
+
+
+def _mkv_header(path):
+    with open(path, "rb") as f:
+        data = f.read(HEADER_SCAN)
+    if len(data) < 4 or _element(data, 0)[0] != EBML_ID:
+        raise TagError("not an EBML file")
+    _, start, size, _ = _element(data, 0)
+    element_id, segment_data, _, _ = _element(data, start + size)
+    if element_id != SEGMENT:
+        raise TagError("no Segment")
+
+    # Top-level children up to the first cluster, skipping ones that run past what we read
+    top = []
+    pos = segment_data
+    while pos + 2 < len(data):
+        element_id, data_start, size, _ = _element(data, pos)
+        if element_id == CLUSTER or size is None or data_start + size > len(data):
+            break
+        top.append((element_id, pos, data_start, size))
+        pos = data_start + size
+    return data, segment_data, top
+
+
+def _mkv_read_title(path):
+    data, _, top = _mkv_header(path)
+    for element_id, _, data_start, size in top:
+        if element_id == INFO:
+            for child_id, _, child_data, child_size in _children(data, data_start, data_start + size):
+                if child_id == TITLE:
+                    return data[child_data:child_data + child_size].decode("utf-8", errors="replace")
+            return ""
+    raise TagError("no Info element in the header")
+
+
+def _mkv_write_title(path, title):
+    data, segment_data, top = _mkv_header(path)
+    index = next((i for i, e in enumerate(top) if e[0] == INFO), None)
+    if index is None:
+        return False
+    _, info_pos, info_data, info_size = top[index]
+    info_end = info_data + info_size
+
+    # New Info payload: everything but the old Title, then the new one
+    parts = []
+    has_crc = False
+    for child_id, child_pos, child_data, child_size in _children(data, info_data, info_end):
+        if child_id == CRC32:
+            has_crc = True
+        elif child_id != TITLE:
+            parts.append(data[child_pos:child_data + child_size])
+    parts.append(_ebml(TITLE, title.encode("utf-8")))
+    payload = b"".join(parts)
+    if has_crc:
+        payload = _crc_element(payload) + payload
+
+    # Room: the old Info plus Void elements directly before and after it
+    region_start, region_end = info_pos, info_end
+    if index > 0 and top[index - 1][0] == VOID:
+        region_start = top[index - 1][1]
+    if index + 1 < len(top) and top[index + 1][0] == VOID:
+        region_end = top[index + 1][2] + top[index + 1][3]
+
+    def layouts():
+        # Prefer keeping Info where it is (no SeekHead update), then moving it back into a leading Void
+        for size_length in range(1, 9):
+            try:
+                info = _ebml(INFO, payload, size_length)
+            except TagError:
+                continue
+            yield info_pos, info
+            if region_start < info_pos:
+                yield region_end - len(info), info
+
+    for new_pos, info in layouts():
+        before = new_pos - region_start
+        after = region_end - new_pos - len(info)
+        if before < 0 or after < 0 or before == 1 or after == 1:
+            continue
+        if new_pos != info_pos and not _seekhead_entry(data, top, INFO):
+            if _has_seekhead(top):
+                continue      # a SeekHead exists but doesn't list Info at a patchable spot
+        block = (_void(before) if before else b"") + info + (_void(after) if after else b"")
+        with open(path, "r+b") as f:
+            if new_pos != info_pos:
+                _patch_seekhead(f, data, top, INFO, new_pos - segment_data)
+            f.seek(region_start)
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+    return False
+
+
+def _crc_element(payload):
+    """The CRC-32 element that goes first in a master element whose other children are payload."""
+    return _ebml(CRC32, struct.pack("<I", zlib.crc32(payload) & 0xFFFFFFFF))
+
+
+def _has_seekhead(top):
+    return any(e[0] == SEEKHEAD for e in top)
+
+
+def _seekhead_entry(data, top, target):
+    """
+    Returns (position_data_offset, width, seekhead_data_start, seekhead_size)
+    for the SeekPosition pointing at target, or None.
+    """
+    target_bytes = _encode_id(target)
+    for element_id, _, data_start, size in top:
+        if element_id != SEEKHEAD:
+            continue
+        for seek_id, _, seek_data, seek_size in _children(data, data_start, data_start + size):
+            if seek_id != SEEK:
+                continue
+            found_id = position = None
+            for child_id, _, child_data, child_size in _children(data, seek_data, seek_data + seek_size):
+                if child_id == SEEK_ID:
+                    found_id = data[child_data:child_data + child_size]
+                elif child_id == SEEK_POSITION:
+                    position = (child_data, child_size)
+            if found_id == target_bytes and position:
+                return position + (data_start, size)
+    return None
+
+
+def _patch_seekhead(f, data, top, target, new_position):
+    entry = _seekhead_entry(data, top, target)
+    if entry is None:
+        return
+    offset, width, start, size = entry
+    seekhead = bytearray(data[start:start + size])
+    seekhead[offset - start:offset - start + width] = new_position.to_bytes(width, "big")
+
+    # Keep a CRC-32 on the SeekHead valid (it covers everything after itself)
+    element_id, crc_data, crc_size, _ = _element(seekhead, 0)
+    if element_id == CRC32 and crc_size == 4:
+        rest = bytes(seekhead[crc_data + 4:])
+        seekhead[crc_data:crc_data + 4] = struct.pack("<I", zlib.crc32(rest) & 0xFFFFFFFF)
+
+    f.seek(start)
+    f.write(seekhead)
@@ -2,36 +2,536 @@
 
 import os
 import sys
+import argparse
+import glob
+import json
+import threading
+import runpy
+import signal
+import socket
+import sqlite3
+import stat
+import struct
 import subprocess
+import tempfile
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 ROOT_DIR = r"C:/users/srulc/onedrive/documents/utils"
 
+# Persistent name -> path index so lookups don't walk the whole tree
+INDEX_FILE = os.path.join(ROOT_DIR, ".utils-index.sqlite3")
+SKIP_DIRS = {"__pycache__", "node_modules", "venv"}
+# Skipped only at these paths under ROOT_DIR, not wherever the name appears
+SKIP_PATHS = {"common"}
+
+# Warm server: heavy modules imported once, scripts forked off it per request.
+# The socket lives in a directory only this user can enter, never directly in /tmp.
+UID = getattr(os, "getuid", lambda: 0)()
+SOCKET_PATH = os.environ.get("UTILS_SOCKET") or os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"utils-{UID}"),
+    "utils.sock",
+)
+WARM_MODULES = ("requests", "bs4", "selectolax.lexbor", "lxml.html", "pdfminer.high_level", "mutagen")
+
 
 def find_file(root, filename):
-    for dirpath, _, filenames in os.walk(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not skip_dir(os.path.join(dirpath, d))]
         if filename in filenames:
             return os.path.join(dirpath, filename)
     return None
 
 
+# ---------------- SCRIPT INDEX ----------------
+
+def normalize_dir(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
+_skip_paths = {normalize_dir(os.path.join(ROOT_DIR, p)) for p in SKIP_PATHS}
+
+
+def skip_dir(path):
+    name = os.path.basename(path)
+    return name.startswith(".") or name in SKIP_DIRS or normalize_dir(path) in _skip_paths
+
+
+def open_index():
+    db = sqlite3.connect(INDEX_FILE)
+    db.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime INTEGER)")
+    db.execute("CREATE TABLE IF NOT EXISTS scripts (path TEXT PRIMARY KEY, name TEXT, dir TEXT)")
+    db.execute("CREATE INDEX IF NOT EXISTS scripts_name ON scripts (name)")
+    return db
+
+
+def scan_dir(db, dirpath):
+    """Records one directory's scripts and returns its (non-skipped) subdirectories."""
+    subdirs = []
+    db.execute("DELETE FROM scripts WHERE dir = ?", (dirpath,))
+    try:
+        # Stat before listing: anything added mid-scan then changes the mtime and gets rescanned
+        mtime = os.stat(dirpath).st_mtime_ns
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if not skip_dir(entry.path):
+                        subdirs.append(entry.path)
+                elif entry.name.lower().endswith(".py"):
+                    db.execute(
+                        "INSERT OR REPLACE INTO scripts VALUES (?, ?, ?)",
+                        (entry.path, entry.name, dirpath),
+                    )
+    except OSError:
+        return []
+    db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (dirpath, mtime))
+    return subdirs
+
+
+def index_tree(db, top):
+    pending = [top]
+    while pending:
+        pending.extend(scan_dir(db, pending.pop()))
+
+
+def rebuild_index(db):
+    db.execute("DELETE FROM dirs")
+    db.execute("DELETE FROM scripts")
+    index_tree(db, ROOT_DIR)
+    db.commit()
+
+
+def refresh_index(db):
+    """Rescans only the directories whose mtime changed since they were indexed."""
+    known = dict(db.execute("SELECT path, mtime FROM dirs"))
+    if not known:
+        rebuild_index(db)
+        return
+
+    for dirpath, mtime in known.items():
+        try:
+            current = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            db.execute("DELETE FROM dirs WHERE path = ?", (dirpath,))
+            db.execute("DELETE FROM scripts WHERE dir = ?", (dirpath,))
+            continue
+        if current != mtime:
+            for sub in scan_dir(db, dirpath):
+                if sub not in known:
+                    index_tree(db, sub)
+    db.commit()
+
+
+def lookup_script(db, filename):
+    row = db.execute(
+        "SELECT path FROM scripts WHERE name = ? ORDER BY path LIMIT 1", (filename,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def locate_script(filename):
+    """Finds a script via the index, falling back to a full walk if the index is unusable."""
+    try:
+        db = open_index()
+    except sqlite3.Error:
+        return find_file(ROOT_DIR, filename)
+
+    try:
+        path = lookup_script(db, filename)
+        if path and os.path.isfile(path):
+            return path
+
+        # Miss or stale hit: pick up whatever changed and try again
+        refresh_index(db)
+        return lookup_script(db, filename)
+    except sqlite3.Error:
+        return find_file(ROOT_DIR, filename)
+    finally:
+        db.close()
+
+# ----------------------------------------------
+
+
+# ---------------- IN-PROCESS / WARM ----------------
+
+def run_inproc(script_path, args):
+    """Runs a script in this interpreter as __main__ and returns its exit code."""
+    sys.argv = [script_path] + list(args)
+    sys.path[0] = os.path.dirname(script_path)
+
+    try:
+        runpy.run_path(script_path, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return 0
+
+
+def warm_supported():
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "fork")
+
+
+def private_dir_ok(path):
+    """True if path is a directory owned by this user that nobody else can write to or enter."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == UID and not st.st_mode & 0o077
+
+
+def peer_uid(sock, socket_path):
+    """uid of the process on the other end (SO_PEERCRED), else the owner of the socket file."""
+    if hasattr(socket, "SO_PEERCRED"):
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", creds)[1]
+    if not private_dir_ok(os.path.dirname(os.path.abspath(socket_path))):
+        return None
+    return os.stat(socket_path).st_uid
+
+
+def recv_exact(conn, size):
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("client disconnected mid-request")
+        data += chunk
+    return data
+
+
+def preload_modules():
+    for name in WARM_MODULES:
+        try:
+            __import__(name)
+            print(f"Preloaded: {name}")
+        except ImportError:
+            print(f"Not installed: {name}")
+
+
+def serve_request(conn, listener):
+    """Forked child: adopt the client's stdio, cwd and environment, then run the script."""
+    listener.close()
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+    code = 1
+    try:
+        # A 4-byte length (carrying the stdio fds), then the JSON request
+        header, fds, _, _ = socket.recv_fds(conn, 4, 3)
+        header += recv_exact(conn, 4 - len(header))
+        request = json.loads(recv_exact(conn, struct.unpack(">I", header)[0]).decode("utf-8"))
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+
+        conn.sendall(f"pid {os.getpid()}\n".encode())
+        code = run_inproc(request["script"], request["args"])
+    except Exception:
+        traceback.print_exc()
+    finally:
+        try:
+            conn.sendall(f"exit {code}\n".encode())
+        except OSError:
+            pass
+        os._exit(code & 0xFF)
+
+
+def serve(socket_path=SOCKET_PATH):
+    if not warm_supported():
+        print("Warm server mode needs Unix sockets and fork(), which this platform lacks.")
+        return 1
+
+    socket_dir = os.path.dirname(os.path.abspath(socket_path))
+    try:
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    except OSError:
+        pass
+    if not private_dir_ok(socket_dir):
+        print(f"Refusing to listen in {socket_dir}: it must be a directory owned by you with mode 0700.")
+        return 1
+
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            print(f"A warm server is already listening on {socket_path}")
+            return 1
+        except OSError:
+            os.unlink(socket_path)
+        finally:
+            probe.close()
+
+    preload_modules()
+
+    # Children report their own exit codes; let the kernel reap them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    listener.listen()
+    print(f"Warm server listening on {socket_path} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            conn, _ = listener.accept()
+            if peer_uid(conn, socket_path) != UID:
+                conn.close()
+                continue
+            if os.fork() == 0:
+                serve_request(conn, listener)
+            conn.close()
+    except KeyboardInterrupt:
+        print("\nStopping warm server.")
+    finally:
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+    return 0
+
+
+def run_warm(script_path, args, socket_path=SOCKET_PATH):
+    """Hands a script to the warm server. Returns None if no server is reachable."""
+    if not warm_supported():
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+
+    # The request carries our environment and terminal, so only hand it to our own server
+    try:
+        owner = peer_uid(sock, socket_path)
+    except OSError:
+        owner = None
+    if owner != UID:
+        print(f"Ignoring warm server at {socket_path}: it isn't running as you.", file=sys.stderr)
+        sock.close()
+        return None
+
+    request = {
+        "script": script_path,
+        "args": list(args),
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+    }
+
+    pid = None
+    code = 1
+    with sock:
+        payload = json.dumps(request).encode("utf-8")
+        socket.send_fds(sock, [struct.pack(">I", len(payload))], [0, 1, 2])
+        sock.sendall(payload)
+        replies = sock.makefile("r", encoding="utf-8")
+        while True:
+            try:
+                line = replies.readline()
+            except KeyboardInterrupt:
+                # The script isn't in our process group, so pass Ctrl+C along
+                if pid:
+                    os.kill(pid, signal.SIGINT)
+                continue
+            if not line:
+                break
+            kind, _, value = line.partition(" ")
+            if kind == "pid":
+                pid = int(value)
+            elif kind == "exit":
+                code = int(value)
+    return code
+
+# ---------------------------------------------------
+
+
+# ---------------- FAN-OUT ----------------
+
+def expand_inputs(patterns):
+    inputs = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                print(f"Warning: '{pattern}' matched nothing")
+            inputs.extend(matches)
+        else:
+            inputs.append(pattern)
+    return inputs
+
+
+def job_name(item):
+    return os.path.basename(os.path.normpath(item)) or item
+
+
+def run_job(script_path, args, item, answers, label, print_lock):
+    """Runs one fan-out job, prefixing each line of its output with the job label."""
+    # Scripts prompt for their input, so feed it on stdin; "{}" in args also gets it
+    cmd = [sys.executable, script_path] + [a.replace("{}", item) for a in args]
+    stdin_text = "\n".join([item] + answers) + "\n"
+
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        env=env,
+    )
+
+    def feed():
+        try:
+            proc.stdin.write(stdin_text)
+            proc.stdin.close()
+        except OSError:
+            pass
+
+    threading.Thread(target=feed, daemon=True).start()
+
+    for line in proc.stdout:
+        with print_lock:
+            print(f"[{label}] {line.rstrip()}", flush=True)
+
+    return proc.wait()
+
+
+def fan_out(script_path, args, patterns, answers, jobs):
+    inputs = expand_inputs(patterns)
+    if not inputs:
+        print("No inputs to process.")
+        return 1
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(inputs)))
+    width = len(str(len(inputs)))
+    labels = [f"{i:0{width}d} {job_name(item)}" for i, item in enumerate(inputs, start=1)]
+
+    print(f"Running {os.path.basename(script_path)} over {len(inputs)} inputs with {jobs} workers\n")
+
+    print_lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(run_job, script_path, args, item, answers, label, print_lock)
+            for item, label in zip(inputs, labels)
+        ]
+        codes = []
+        for future in futures:
+            try:
+                codes.append(future.result())
+            except Exception as e:
+                print(f"Error running job: {e}")
+                codes.append(1)
+
+    failed = [(item, code) for item, code in zip(inputs, codes) if code != 0]
+
+    print(f"\nDone. {len(inputs) - len(failed)} succeeded, {len(failed)} failed.")
+    for item, code in failed:
+        print(f"  exit {code}: {item}")
+
+    return 1 if failed else 0
+
+# -----------------------------------------
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="utils.py",
+        usage="utils.py [--reindex] [--inproc | --warm] <script_name> [args...]\n"
+              "       utils.py --each INPUT [--each INPUT ...] [--answer TEXT ...] [--jobs N] <script_name> [args...]\n"
+              "       utils.py --serve",
+    )
+    parser.add_argument("--reindex", action="store_true",
+                        help="rebuild the script index before running")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--inproc", action="store_true",
+                      help="run the script inside this interpreter instead of a new one")
+    mode.add_argument("--warm", action="store_true",
+                      help="run the script on the warm server (falls back to a new interpreter)")
+    mode.add_argument("--serve", action="store_true",
+                      help="start a warm server that keeps heavy modules imported")
+    parser.add_argument("--each", action="append", default=[], metavar="INPUT",
+                        help="run the script once per input (path or glob), in parallel")
+    parser.add_argument("--answer", action="append", default=[], metavar="TEXT",
+                        help="extra line fed to each job's prompts after the input")
+    parser.add_argument("--jobs", type=int, default=0, metavar="N",
+                        help="parallel jobs for --each (default: CPU count)")
+    parser.add_argument("script", nargs="?")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    return parser.parse_args(argv)
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: utils.py <script_name> [args...]")
+    opts = parse_args(sys.argv[1:])
+
+    if opts.serve:
+        sys.exit(serve())
+
+    if opts.reindex:
+        db = open_index()
+        try:
+            rebuild_index(db)
+            count = db.execute("SELECT COUNT(*) FROM scripts").fetchone()[0]
+        finally:
+            db.close()
+        if not opts.script:
+            print(f"Indexed {count} scripts under {ROOT_DIR}")
+            sys.exit(0)
+
+    if not opts.script:
+        print("Usage: utils.py [--reindex] [--inproc | --warm] <script_name> [args...]")
         sys.exit(1)
 
-    target_name = sys.argv[1]
+    target_name = opts.script
 
     if not target_name.lower().endswith(".py"):
         target_name += ".py"
 
-    passthrough_args = sys.argv[2:]
+    passthrough_args = opts.args
 
-    script_path = find_file(ROOT_DIR, target_name)
+    script_path = locate_script(target_name)
 
     if not script_path:
         print(f"Error: '{target_name}' not found under {ROOT_DIR}")
         sys.exit(1)
 
+    if opts.each:
+        if opts.inproc or opts.warm:
+            print("Error: --each always runs jobs in separate interpreters")
+            sys.exit(1)
+        sys.exit(fan_out(script_path, passthrough_args, opts.each, opts.answer, opts.jobs))
+
+    if opts.inproc:
+        sys.exit(run_inproc(script_path, passthrough_args))
+
+    if opts.warm:
+        code = run_warm(script_path, passthrough_args)
+        if code is not None:
+            sys.exit(code)
+
     cmd = [sys.executable, script_path] + passthrough_args
 
     try: